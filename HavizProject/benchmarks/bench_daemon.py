@@ -0,0 +1,76 @@
+"""p50/p99 latency: one-shot CLI process per query vs. the resident `serve` daemon.
+
+Usage: python benchmarks/bench_daemon.py --parcels 100000 --queries 500 --oneshot-runs 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COURIERLITE = os.path.join(HERE, '..', 'courierlite')
+sys.path.insert(0, COURIERLITE)
+
+from datagen import write_dataset
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def report(name, samples):
+    print(f"{name:<22} p50 {percentile(samples, 50) * 1000:9.3f} ms   p99 {percentile(samples, 99) * 1000:9.3f} ms"
+          f"   ({len(samples)} runs)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--parcels', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--oneshot-runs', type=int, default=10)
+    args = parser.parse_args()
+
+    from server import DispatchClient
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_dataset(tmp, parcels=args.parcels)
+        data_args = ['--hubs', paths['hubs'], '--parcels', paths['parcels'], '--riders', paths['riders'],
+                     '--pickups', paths['pickups']]
+        cli = os.path.join(COURIERLITE, 'cli.py')
+
+        oneshot = []
+        for _ in range(args.oneshot_runs):
+            start = time.perf_counter()
+            # --no-cache: every run does the full work (and the user's own cache folder is left alone)
+            subprocess.run([sys.executable, cli, *data_args, '--assign', '--preview', '--rider', 'R1', '--no-cache'],
+                           check=True, stdout=subprocess.DEVNULL)
+            oneshot.append(time.perf_counter() - start)
+
+        sock = os.path.join(tmp, 'courier.sock')
+        daemon = subprocess.Popen([sys.executable, cli, 'serve', '--socket', sock, *data_args], stdout=subprocess.PIPE)
+        try:
+            daemon.stdout.readline()  # "Serving on ..." once the data is loaded
+            while not os.path.exists(sock):
+                time.sleep(0.01)
+            client = DispatchClient(sock)
+            resident = {'PREVIEW R1': [], 'WHERE P1': [], 'ASSIGN': []}
+            for i in range(args.queries):
+                for request, samples in resident.items():
+                    start = time.perf_counter()
+                    client.request(request)
+                    samples.append(time.perf_counter() - start)
+            client.close()
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print(f"{args.parcels} parcels")
+    report('one-shot CLI', oneshot)
+    for request, samples in resident.items():
+        report(f'daemon {request}', samples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Parcels recovered by the local search (improve.improve_assignments) for each strategy and a few time budgets.
+
+Riders are only a little short of room here (many riders per hub), which is where moving and
+swapping parcels helps; when every rider is full there is nothing to recover.
+Usage: python benchmarks/bench_improve.py --parcels 20000 --riders-per-hub 40 --budgets 50 200 1000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+from datagen import write_dataset
+from engine import assign_parcels, load_hubs, load_parcels, load_pickups, load_riders
+from improve import improve_assignments
+from strategies import STRATEGIES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--parcels', type=int, default=20000)
+    parser.add_argument('--hubs', type=int, default=20)
+    parser.add_argument('--riders-per-hub', type=int, default=40)
+    parser.add_argument('--budgets', type=float, nargs='+', default=[50, 200, 1000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_dataset(tmp, parcels=args.parcels, hubs=args.hubs, riders_per_hub=args.riders_per_hub,
+                              weights='bimodal')
+        hubs = load_hubs(paths['hubs'])
+        parcels = load_parcels(paths['parcels'])
+        riders = load_riders(paths['riders'])
+        pickups = load_pickups(paths['pickups'], hubs)
+        print(f"{args.parcels} parcels, {args.hubs} hubs, {args.riders_per_hub} riders per hub")
+        for strategy in STRATEGIES:
+            assignments, unassigned = assign_parcels(hubs, riders, parcels, pickups, strategy=strategy)
+            for budget in args.budgets:
+                start = time.perf_counter()
+                _, left, recovered = improve_assignments(riders, parcels, assignments, unassigned, budget)
+                ms = (time.perf_counter() - start) * 1000
+                print(f"{strategy:<22} budget {budget:6.0f} ms | took {ms:6.0f} ms | "
+                      f"unassigned {len(unassigned)} -> {len(left)} | recovered {recovered}")
+
+
+if __name__ == '__main__':
+    main()
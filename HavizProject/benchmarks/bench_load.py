@@ -0,0 +1,63 @@
+"""Scaling of parcel parsing and load_parcels with jobs=N, on one big file and on the same rows in shards.
+
+Parsing (shards.iter_rows) is the part that runs in the worker processes; load_parcels also
+builds and indexes the Parcel objects, which stays in the main process.
+Usage: python benchmarks/bench_load.py --parcels 1000000 --shards 16 --jobs 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+from datagen import write_dataset
+from engine import check_parcel_row, load_parcels
+from shards import iter_rows
+
+
+def write_shards(path: str, out_dir: str, shards: int) -> str:
+    """Cut path into shards files parcels-000.csv, ... (each with the header). Returns their glob."""
+    with open(path) as f:
+        header, *rows = f.readlines()
+    size = -(-len(rows) // shards)
+    for k in range(shards):
+        with open(os.path.join(out_dir, f'parcels-{k:03d}.csv'), 'w') as f:
+            f.write(header)
+            f.writelines(rows[k * size:(k + 1) * size])
+    return os.path.join(out_dir, 'parcels-*.csv')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--parcels', type=int, default=1000000)
+    parser.add_argument('--shards', type=int, default=16)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_dataset(tmp, parcels=args.parcels)['parcels']
+        shard_dir = os.path.join(tmp, 'shards')
+        os.mkdir(shard_dir)
+        pattern = write_shards(path, shard_dir, args.shards)
+        print(f"{args.parcels} parcels, {args.shards} shards, {os.cpu_count()} CPUs")
+        for label, source in (('one file', path), ('shards', pattern)):
+            baseline = None
+            for jobs in args.jobs:
+                start = time.perf_counter()
+                rows = list(iter_rows(source, check_parcel_row, jobs))
+                parse = time.perf_counter() - start
+                start = time.perf_counter()
+                loaded = len(load_parcels(source, jobs).ids())
+                load = time.perf_counter() - start
+                if baseline is None:
+                    baseline = (rows, parse, load)
+                same = 'same' if rows == baseline[0] else 'DIFFERENT'
+                print(f"{label} jobs={jobs} | parse {parse:.2f}s x{baseline[1] / parse:.2f} | "
+                      f"load_parcels {load:.2f}s x{baseline[2] / load:.2f} | {loaded} parcels | {same} rows")
+
+
+if __name__ == '__main__':
+    main()
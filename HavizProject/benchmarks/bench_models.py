@@ -0,0 +1,68 @@
+"""Bytes per object and total RSS for slotted models vs. the old dict-based ones.
+
+"before" rebuilds each model class without __slots__, which is how models.py used to be.
+Each (variant, count) run happens in its own child process so RSS numbers don't mix.
+Usage: python benchmarks/bench_models.py --count 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+
+def dict_variant(cls):
+    """Same methods as cls, but instances get a plain __dict__ (the pre-slots layout)."""
+    skip = set(cls.__slots__) | {'__slots__', '__dict__', '__weakref__'}
+    namespace = {k: v for k, v in vars(cls).items() if k not in skip}
+    return type(f'Dict{cls.__name__}', (), namespace)
+
+
+def build(variant: str, count: int):
+    from models import Parcel
+    cls = Parcel if variant == 'after' else dict_variant(Parcel)
+    # Distinct IDs per parcel, like a real feed; the other strings are shared
+    return [cls(f'P{i}', 'Student', 'EXPRESS' if i % 3 == 0 else 'NORMAL', 'H1', 'Sabiiti', 1.5 + (i % 7))
+            for i in range(count)]
+
+
+def run_variant(variant: str, count: int) -> dict:
+    base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    parcels = build(variant, min(count, 100000))  # tracemalloc is slow, so sample for bytes/object
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ids = sum(sys.getsizeof(p.parcel_id) for p in parcels)  # The ID strings exist either way
+    per_object = (traced - ids) / len(parcels)
+    del parcels
+    parcels = build(variant, count)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'variant': variant, 'count': count, 'bytes_per_parcel': round(per_object, 1),
+            'rss_mb': round(peak_kb / 1024, 1), 'rss_growth_mb': round((peak_kb - base_kb) / 1024, 1),
+            'parcels': len(parcels)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--variant', choices=['before', 'after'])  # Internal: run one variant here
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.count)))
+        return
+    for variant in ('before', 'after'):
+        out = subprocess.run([sys.executable, __file__, '--variant', variant, '--count', str(args.count)],
+                             check=True, capture_output=True, text=True)
+        r = json.loads(out.stdout)
+        print(f"{r['variant']:>6} | {r['bytes_per_parcel']} bytes/Parcel | peak RSS {r['rss_mb']} MB "
+              f"(+{r['rss_growth_mb']} MB for {r['count']} parcels)")
+
+
+if __name__ == '__main__':
+    main()
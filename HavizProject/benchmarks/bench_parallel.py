@@ -0,0 +1,47 @@
+"""Scaling of assign_parcels(jobs=N) on a multi-hub synthetic data set, checked against jobs=1.
+
+Usage: python benchmarks/bench_parallel.py --parcels 500000 --hubs 64 --jobs 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+from datagen import write_dataset
+from engine import load_hubs, load_parcels, load_riders, load_pickups, assign_parcels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--parcels', type=int, default=500000)
+    parser.add_argument('--hubs', type=int, default=64)
+    parser.add_argument('--riders-per-hub', type=int, default=50)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_dataset(tmp, parcels=args.parcels, hubs=args.hubs, riders_per_hub=args.riders_per_hub)
+        hubs = load_hubs(paths['hubs'])
+        riders = load_riders(paths['riders'])
+        parcels = load_parcels(paths['parcels'])
+        pickups = load_pickups(paths['pickups'], hubs)
+
+    print(f"{args.parcels} parcels, {args.hubs} hubs, {os.cpu_count()} CPUs")
+    baseline = None
+    for jobs in args.jobs:
+        start = time.perf_counter()
+        assignments, unassigned = assign_parcels(hubs, riders, parcels, pickups, jobs=jobs)
+        seconds = time.perf_counter() - start
+        result = ({k: [p.parcel_id for p in v] for k, v in assignments.items()}, unassigned)
+        if baseline is None:
+            baseline = (result, seconds)
+        same = 'same' if result == baseline[0] else 'DIFFERENT'
+        print(f"jobs={jobs} | {seconds:.2f}s | x{baseline[1] / seconds:.2f} | {same} as jobs={args.jobs[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Rows/sec of the two parcel readers: csv.reader (read_rows) and the memory-mapped scan (scan_rows).
+
+Also times a copy of the file with every recipient quoted, which the scan hands to csv.reader,
+and checks that both readers give the same rows.
+Usage: python benchmarks/bench_scan.py --parcels 1000000 [--data-dir DIR]
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+from datagen import write_dataset
+from engine import PARCEL_LAYOUT, check_parcel_row
+from shards import read_rows, scan_rows
+
+
+def quoted_copy(path: str, out_path: str):
+    """Same rows, but with quotes around every text field."""
+    with open(path, newline='') as src, open(out_path, 'w', newline='') as dst:
+        csv.writer(dst, quoting=csv.QUOTE_NONNUMERIC).writerows(
+            row[:5] + [float(row[5])] if n else row for n, row in enumerate(csv.reader(src)))
+
+
+def timed(label: str, rows_of):
+    start = time.perf_counter()
+    rows = list(rows_of())
+    seconds = time.perf_counter() - start
+    print(f"{label:<22} {seconds:6.2f}s | {len(rows) / seconds:10.0f} rows/s")
+    return rows, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--parcels', type=int, default=1000000)
+    parser.add_argument('--data-dir')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        if not args.data_dir:
+            write_dataset(data_dir, parcels=args.parcels)
+        path = os.path.join(data_dir, 'parcels.csv')
+        quoted = os.path.join(tmp, 'parcels-quoted.csv')
+        quoted_copy(path, quoted)
+        print(f"{path}: {os.path.getsize(path) / 1e6:.0f} MB")
+        by_csv, csv_seconds = timed('csv.reader', lambda: read_rows(path, check_parcel_row))
+        by_scan, scan_seconds = timed('mmap scan', lambda: scan_rows(path, check_parcel_row, PARCEL_LAYOUT))
+        timed('csv.reader (quoted)', lambda: read_rows(quoted, check_parcel_row))
+        timed('mmap scan (quoted)', lambda: scan_rows(quoted, check_parcel_row, PARCEL_LAYOUT))
+        same = 'same rows' if by_csv == by_scan else 'DIFFERENT rows'
+        print(f"scan is x{csv_seconds / scan_seconds:.2f} on the plain file, {same}")
+
+
+if __name__ == '__main__':
+    main()
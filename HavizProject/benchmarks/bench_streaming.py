@@ -0,0 +1,69 @@
+"""Rows/sec and peak RSS: load_parcels + assign_parcels vs. the chunked streaming driver.
+
+Each mode runs in its own child process so peak RSS is not shared between them.
+Usage: python benchmarks/bench_streaming.py --parcels 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+
+def run_mode(mode: str, data_dir: str, chunk_size: int) -> dict:
+    from engine import load_hubs, load_parcels, load_riders, load_pickups, assign_parcels, assign_parcels_chunked
+    paths = {name: os.path.join(data_dir, f'{name}.csv') for name in ('hubs', 'riders', 'parcels', 'pickups')}
+    start = time.perf_counter()
+    hubs = load_hubs(paths['hubs'])
+    riders = load_riders(paths['riders'])
+    pickups = load_pickups(paths['pickups'], hubs)
+    rows = assigned = 0
+    if mode == 'full':
+        parcels = load_parcels(paths['parcels'])
+        assignments, unassigned = assign_parcels(hubs, riders, parcels, pickups)
+        rows = len(parcels.ids())
+        assigned = sum(len(v) for v in assignments.values())
+    else:
+        for _, hub_assignments, hub_unassigned in assign_parcels_chunked(riders, paths['parcels'], pickups, chunk_size):
+            n = sum(len(v) for v in hub_assignments.values())
+            assigned += n
+            rows += n + len(hub_unassigned)
+    seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Linux reports KiB
+    return {'mode': mode, 'rows': rows, 'assigned': assigned, 'seconds': round(seconds, 3),
+            'rows_per_sec': round(rows / seconds), 'peak_rss_mb': round(peak_kb / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--parcels', type=int, default=1000000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--data-dir')
+    parser.add_argument('--mode', choices=['full', 'stream'])  # Internal: run one mode in this process
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.data_dir, args.chunk_size)))
+        return
+
+    from datagen import write_dataset
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        if not args.data_dir:
+            write_dataset(data_dir, parcels=args.parcels)
+        for mode in ('full', 'stream'):
+            out = subprocess.run([sys.executable, __file__, '--mode', mode, '--data-dir', data_dir,
+                                  '--chunk-size', str(args.chunk_size)], check=True, capture_output=True, text=True)
+            result = json.loads(out.stdout)
+            print(f"{result['mode']:>6} | {result['rows']} rows | {result['rows_per_sec']} rows/s | "
+                  f"peak RSS {result['peak_rss_mb']} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Seconds to check a parcels CSV: load_parcels, a row-by-row check of every rule, and validate_parcels.
+
+load_parcels only checks column counts and weights (it also builds the Parcel objects);
+the row-by-row loop checks the same rules as validate_parcels, one row at a time.
+Usage: python benchmarks/bench_validate.py --parcels 1000000 [--data-dir DIR]
+"""
+import argparse
+import csv
+import logging
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+
+def check_row_by_row(path, hubs, riders):
+    """The per-row way: one csv row at a time, one if per rule. Returns how many rows had a problem."""
+    known_hubs = set(hubs.ids())
+    max_load = {hub_id: max(r.max_load_kg for r in hub_riders) for hub_id, hub_riders in riders.grouped_by_hub().items()}
+    bad = 0
+    with open(path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) != 6:
+                bad += 1
+                continue
+            try:
+                weight = float(row[5])
+            except ValueError:
+                bad += 1
+                continue
+            if (weight < 0 or row[2].upper() not in ('EXPRESS', 'NORMAL') or row[3] not in known_hubs
+                    or weight > max_load.get(row[3], float('inf'))):
+                bad += 1
+    return bad
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    seconds = time.perf_counter() - start
+    print(f"{label:<16} {seconds:7.3f} s")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--parcels', type=int, default=1000000)
+    parser.add_argument('--data-dir')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # Loader summaries aren't what we're timing
+
+    from engine import load_hubs, load_parcels, load_riders
+    from validate import validate_parcels
+    from datagen import write_dataset
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        if not args.data_dir:
+            write_dataset(data_dir, parcels=args.parcels)
+        path = os.path.join(data_dir, 'parcels.csv')
+        hubs = load_hubs(os.path.join(data_dir, 'hubs.csv'))
+        riders = load_riders(os.path.join(data_dir, 'riders.csv'))
+        load = timed('load_parcels', load_parcels, path)
+        per_row = timed('row by row', check_row_by_row, path, hubs, riders)
+        whole = timed('validate_parcels', validate_parcels, path, hubs, riders)
+        print(f"validate_parcels is {load / whole:.1f}x faster than load_parcels, "
+              f"{per_row / whole:.1f}x faster than row by row")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Fail (exit 1) if a no-op CLI call imports more than the budget allows.
+
+Uses `python -X importtime`, counts only imports beyond what a bare `python -c pass` does,
+and keeps the best of several runs so a busy machine doesn't cause false alarms.
+
+Usage: python benchmarks/check_import_budget.py [--budget-ms 5] [--runs 5]
+tests/test_import_budget.py runs the same check under pytest.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.join(HERE, '..', 'courierlite', 'cli.py')
+
+BUDGET_MS = 5.0  # Extra import time allowed for --version / --help
+FLAGS = ('--version', '--help')
+HEAVY = {'engine', 'argparse', 'csv', 'logging', 'json', 'concurrent', 'typing'}  # Must not load on the fast path
+
+
+def top_level_imports(command):
+    """{module: cumulative microseconds} for the top-level imports of one run."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', *command],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith(' ') or name.startswith('  '):
+            continue  # Nested import, already counted in its parent
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def measure(flag: str, runs: int = 5, baseline=None):
+    """(best import ms over runs, heavy modules loaded) for one `cli.py FLAG` call."""
+    if baseline is None:
+        baseline = set(top_level_imports(['-c', 'pass']))
+    best, extra_modules = None, set()
+    for _ in range(runs):
+        times = {name: us for name, us in top_level_imports([CLI, flag]).items() if name not in baseline}
+        total = sum(times.values()) / 1000
+        best = total if best is None else min(best, total)
+        extra_modules |= set(times)
+    return best, sorted(m for m in extra_modules if m.split('.')[0] in HEAVY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = set(top_level_imports(['-c', 'pass']))
+    failed = False
+    for flag in FLAGS:
+        best, heavy = measure(flag, args.runs, baseline)
+        ok = best <= args.budget_ms and not heavy
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} cli.py {flag:<10} {best:6.2f} ms of imports (budget {args.budget_ms} ms)"
+              + (f", loads {', '.join(heavy)}" if heavy else ''))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
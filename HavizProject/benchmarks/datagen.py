@@ -0,0 +1,111 @@
+"""Seeded synthetic CourierLite data. Same seed and options, same files, every time.
+
+Usage: python benchmarks/datagen.py OUT_DIR --parcels 1000000 --hubs 50 --hub-skew 1.1 \\
+           --express-ratio 0.3 --weights lognormal --pickup-ratio 0.1 --seed 7
+
+--hub-skew 0 spreads parcels evenly over hubs; larger values follow a Zipf curve,
+so a few hubs get most of the parcels (and riders are spread the same way).
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+
+DESTINATIONS = ['Sabiiti', 'Nsibambi', 'Davids Ark', 'Skyz', 'Tupe', 'Ankrah', 'Luna']
+RIDER_NAMES = ['Sunday', 'Pascal', 'Timo', 'Matt', 'Cole']
+WEIGHT_MODELS = ('uniform', 'lognormal', 'bimodal')
+
+
+def hub_shares(hubs: int, skew: float):
+    """Fraction of parcels (and riders) for each hub. skew=0 is even, bigger is more lopsided."""
+    raw = [1.0 / (rank ** skew) for rank in range(1, hubs + 1)]
+    total = sum(raw)
+    return [r / total for r in raw]
+
+
+def weight_sampler(rnd: random.Random, model: str):
+    """A function giving one parcel weight in kg, rounded to grams."""
+    if model == 'uniform':
+        return lambda: round(rnd.uniform(0.2, 8.0), 3)
+    if model == 'lognormal':  # Mostly light, a long tail of heavy parcels
+        return lambda: round(min(40.0, max(0.05, rnd.lognormvariate(math.log(1.5), 0.8))), 3)
+    if model == 'bimodal':  # Envelopes and boxes
+        return lambda: round(rnd.uniform(0.1, 0.6) if rnd.random() < 0.7 else rnd.uniform(6.0, 14.0), 3)
+    raise ValueError(f"Unknown weight model {model!r}, pick one of: {', '.join(WEIGHT_MODELS)}")
+
+
+def write_dataset(out_dir: str, parcels: int = 100000, hubs: int = 20, riders_per_hub: int = 10,
+                  seed: int = 7, hub_skew: float = 0.0, express_ratio: float = 0.3,
+                  weights: str = 'uniform', pickup_ratio: float = 0.1) -> dict:
+    """Write hubs.csv, riders.csv, parcels.csv and pickups.csv into out_dir. Returns the paths."""
+    rnd = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, f'{name}.csv') for name in ('hubs', 'riders', 'parcels', 'pickups')}
+    hub_ids = [f'H{h + 1}' for h in range(hubs)]
+    shares = hub_shares(hubs, hub_skew)
+    cum_shares = list(itertools.accumulate(shares))
+    next_weight = weight_sampler(rnd, weights)
+
+    with open(paths['hubs'], 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['hub_id', 'hub_name', 'campus'])
+        for h, hub_id in enumerate(hub_ids):
+            w.writerow([hub_id, f'Hub {h + 1}', 'UCU' if h % 2 else 'Mukono'])
+
+    with open(paths['pickups'], 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['pickup_id', 'label', 'hub_id', 'bias'])
+        for h, hub_id in enumerate(hub_ids):
+            w.writerow([f'K{h + 1}', f'Kiosk {h + 1}', hub_id, rnd.randint(-1, 2)])
+
+    with open(paths['riders'], 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['rider_id', 'name', 'max_load_kg', 'home_hub_id'])
+        n = 0
+        for hub_id, share in zip(hub_ids, shares):
+            # Busy hubs get more riders; every hub keeps at least one
+            for _ in range(max(1, round(riders_per_hub * hubs * share))):
+                n += 1
+                w.writerow([f'R{n}', rnd.choice(RIDER_NAMES), rnd.choice([5.0, 15.0, 30.0]), hub_id])
+
+    with open(paths['parcels'], 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['parcel_id', 'recipient', 'priority', 'hub_id', 'destination', 'weight_kg'])
+        batch = []
+        for p in range(parcels):
+            hub = rnd.choices(hub_ids, cum_weights=cum_shares)[0] if hub_skew else rnd.choice(hub_ids)
+            if rnd.random() < pickup_ratio:
+                destination = f'PICKUP:K{rnd.randint(1, hubs)}'
+            else:
+                destination = rnd.choice(DESTINATIONS)
+            batch.append((f'P{p + 1}', f'Student {p + 1}', 'EXPRESS' if rnd.random() < express_ratio else 'NORMAL',
+                          hub, destination, next_weight()))
+            if len(batch) >= 10000:
+                w.writerows(batch)
+                batch = []
+        w.writerows(batch)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('out_dir')
+    parser.add_argument('--parcels', type=int, default=100000)
+    parser.add_argument('--hubs', type=int, default=20)
+    parser.add_argument('--riders-per-hub', type=int, default=10)
+    parser.add_argument('--hub-skew', type=float, default=0.0)
+    parser.add_argument('--express-ratio', type=float, default=0.3)
+    parser.add_argument('--weights', choices=WEIGHT_MODELS, default='uniform')
+    parser.add_argument('--pickup-ratio', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    paths = write_dataset(args.out_dir, args.parcels, args.hubs, args.riders_per_hub, args.seed,
+                          args.hub_skew, args.express_ratio, args.weights, args.pickup_ratio)
+    for name, path in paths.items():
+        print(f"{name}: {path}")
+
+
+if __name__ == '__main__':
+    main()
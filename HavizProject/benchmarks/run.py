@@ -0,0 +1,141 @@
+"""Scale benchmark: time every CourierLite phase at several data sizes and save the numbers as JSON.
+
+Usage:
+  python benchmarks/run.py --sizes 1000 10000 100000 1000000 --out results.json
+  python benchmarks/run.py --sizes 1000 10000 --compare old-results.json   # side by side with an older run
+
+Each size runs in its own child process so memory numbers don't leak between sizes.
+Data sets are generated once per (size, options) into --data-dir and reused.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+PHASES = ('load_hubs', 'load_parcels', 'load_riders', 'load_pickups', 'assign_parcels', 'preview')
+
+
+def _rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # Linux reports KiB
+
+
+def run_phases(paths: dict, use_tracemalloc: bool) -> list:
+    """Run every phase once, in order. Returns one result dict per phase."""
+    from engine import (load_hubs, load_parcels, load_riders, load_pickups, assign_parcels,
+                        express_then_normal, heavy_first)
+    results = []
+    state = {}
+
+    def phase(name, fn, count):
+        if use_tracemalloc:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        state[name] = fn()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        row = {'phase': name, 'seconds': round(wall, 4), 'cpu_seconds': round(cpu, 4),
+               'items': count(state[name]), 'peak_rss_mb': _rss_mb()}
+        if use_tracemalloc:
+            row['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+            tracemalloc.stop()
+        results.append(row)
+
+    def preview():
+        lines = 0
+        for rider in state['load_riders'].all():
+            rider_parcels = state['assign_parcels'][0].get(rider.rider_id, [])
+            for _ in heavy_first(2.0)(express_then_normal(iter(rider_parcels))):
+                lines += 1
+        return lines
+
+    phase('load_hubs', lambda: load_hubs(paths['hubs']), lambda r: len(r.ids()))
+    phase('load_parcels', lambda: load_parcels(paths['parcels']), lambda r: len(r.ids()))
+    phase('load_riders', lambda: load_riders(paths['riders']), lambda r: len(r.ids()))
+    phase('load_pickups', lambda: load_pickups(paths['pickups'], state['load_hubs']), len)
+    phase('assign_parcels', lambda: assign_parcels(state['load_hubs'], state['load_riders'],
+                                                   state['load_parcels'], state['load_pickups']),
+          lambda r: sum(len(v) for v in r[0].values()))
+    phase('preview', preview, lambda n: n)
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True)
+        return out.stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def compare(current: dict, baseline: dict):
+    """Print seconds and peak RSS side by side with a baseline results file."""
+    old = {(r['size'], r['phase']): r for r in baseline['results']}
+    print(f"baseline {baseline['commit']} vs current {current['commit']}")
+    print(f"{'size':>9} {'phase':<15} {'old s':>9} {'new s':>9} {'ratio':>7} {'old MB':>8} {'new MB':>8}")
+    for r in current['results']:
+        b = old.get((r['size'], r['phase']))
+        if b is None:
+            continue
+        ratio = r['seconds'] / b['seconds'] if b['seconds'] else float('nan')
+        print(f"{r['size']:>9} {r['phase']:<15} {b['seconds']:>9.4f} {r['seconds']:>9.4f} {ratio:>7.2f} "
+              f"{b['peak_rss_mb']:>8} {r['peak_rss_mb']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--hubs', type=int, default=50)
+    parser.add_argument('--riders-per-hub', type=int, default=10)
+    parser.add_argument('--hub-skew', type=float, default=1.0)
+    parser.add_argument('--express-ratio', type=float, default=0.3)
+    parser.add_argument('--weights', default='lognormal')
+    parser.add_argument('--pickup-ratio', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--data-dir', default=os.path.join(HERE, '.data'))
+    parser.add_argument('--tracemalloc', action='store_true', help='also record traced peak per phase (slower)')
+    parser.add_argument('--out', default='bench-results.json')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    parser.add_argument('--child', help=argparse.SUPPRESS)  # Internal: run one data set in this process
+    args = parser.parse_args()
+
+    if args.child:
+        paths = {name: os.path.join(args.child, f'{name}.csv') for name in ('hubs', 'riders', 'parcels', 'pickups')}
+        print(json.dumps(run_phases(paths, args.tracemalloc)))
+        return
+
+    from datagen import write_dataset
+    options = {'hubs': args.hubs, 'riders_per_hub': args.riders_per_hub, 'seed': args.seed,
+               'hub_skew': args.hub_skew, 'express_ratio': args.express_ratio,
+               'weights': args.weights, 'pickup_ratio': args.pickup_ratio}
+    report = {'commit': _git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+              'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'options': options, 'results': []}
+    for size in args.sizes:
+        tag = '-'.join(f'{v}' for v in options.values())
+        data_dir = os.path.join(args.data_dir, f'n{size}-{tag}')
+        if not os.path.exists(os.path.join(data_dir, 'parcels.csv')):
+            write_dataset(data_dir, parcels=size, **options)
+        cmd = [sys.executable, __file__, '--child', data_dir] + (['--tracemalloc'] if args.tracemalloc else [])
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        for row in json.loads(out.stdout):
+            row['size'] = size
+            report['results'].append(row)
+            print(f"{size:>9} {row['phase']:<15} {row['seconds']:>9.4f}s {row['items']:>10} items "
+                  f"peak RSS {row['peak_rss_mb']} MB")
+
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import hashlib  # Fingerprints of the input, so equal input finds the same file
+import json  # Whole-run results are small JSON documents
+import logging
+import os
+import time
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+from models import Parcel
+
+# Result cache: one small file per hub plan, named after a hash of everything the planner sees
+# (strategy, rider capacities, parcel IDs, biases, weights, how many are EXPRESS).
+# Same input -> same name -> no need to plan again. Like keeping yesterday's answer sheet for a repeated exam.
+# Files used least recently are deleted first once there are more than max_entries, or once they take
+# more than max_bytes together (a whole-run entry for a million parcels is about 11 MB, a hub plan a few KB).
+#
+# On top of that, a whole run can be kept: run_key hashes the bytes of every input file plus the
+# strategy, and the final assignments are stored under that name. A repeat run with the same files
+# reads the answer back before a single CSV is parsed; if anything changed, only the changed hubs
+# are planned again through the per-hub plans.
+#
+# A cache may only ever make a run faster: a folder that can't be written turns the cache off
+# (with one warning), and a file that can't be read back counts as a miss.
+
+CACHE_VERSION = b'courierlite-plan-1'  # Bump when a strategy changes its answers
+DEFAULT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'courierlite')
+STALE_TMP_SECONDS = 600  # A .tmp file this old was left by a run that died mid-write
+
+logger = logging.getLogger(__name__)
+
+
+def plan_key(payload: Tuple) -> str:
+    """Hash of a _plan_hub payload: (strategy, caps, ids, biases, weights, express_count)."""
+    strategy, caps, ids, biases, weights, express_count = payload
+    h = hashlib.sha256(CACHE_VERSION)
+    h.update(f'{strategy}\0{express_count}\0{len(caps)}\0{len(ids)}\0'.encode('utf-8'))
+    h.update(array('d', caps).tobytes())
+    h.update('\0'.join(ids).encode('utf-8'))
+    h.update(array('i', biases).tobytes())
+    h.update(array('d', weights).tobytes())
+    return h.hexdigest()
+
+
+def run_key(strategy: str, sources: Dict[str, List[Optional[str]]]) -> str:
+    """Hash of the strategy and the contents of every input file, e.g. {'parcels': [shard paths], 'pickups': [None]}.
+
+    A missing file (or None) counts as "no file", which is different from an empty one.
+    """
+    h = hashlib.sha256(CACHE_VERSION)
+    h.update(f'run\0{strategy}\0'.encode('utf-8'))
+    for name in sorted(sources):
+        h.update(f'{name}\0{len(sources[name])}\0'.encode('utf-8'))
+        for path in sources[name]:
+            if path is None or not os.path.exists(path):
+                h.update(b'-' * 32)
+                continue
+            file_hash = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    file_hash.update(chunk)
+            h.update(file_hash.digest())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Per-hub plans stored on disk, with least-recently-used eviction."""
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 4096, max_bytes: int = 256 << 20):
+        self.directory = directory or os.environ.get('COURIERLITE_CACHE_DIR', DEFAULT_DIR)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            self._turn_off(e)
+
+    def _turn_off(self, error: OSError):
+        """Stop using the cache for the rest of the run. The run itself goes on."""
+        if self.enabled:
+            logger.warning("Result cache off, %s can't be used: %s", self.directory, error)
+        self.enabled = False
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.plan')
+
+    def _write(self, path: str, data: bytes):
+        tmp = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)  # Readers see the whole file or nothing
+        except OSError as e:  # Read-only folder, full disk, ...
+            self._turn_off(e)
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def _read(self, path: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:  # Missing or unreadable: plan again
+            return None
+        try:
+            os.utime(path)  # Mark as just used, for LRU
+        except OSError:
+            pass
+        return data
+
+    def get(self, key: str) -> Optional[Tuple[List[Tuple[int, int]], List[int]]]:
+        """The cached (picks, touched) plan, or None."""
+        raw = self._read(self._path(key))
+        data = array('i')
+        try:
+            data.frombytes(raw)
+        except (TypeError, ValueError):  # Missing, or a half-written leftover
+            data = None
+        if not data or not 0 <= data[0] <= (len(data) - 1) // 2:  # Empty, or cut short
+            self.misses += 1
+            return None
+        self.hits += 1
+        n = data[0]
+        flat = data[1:1 + 2 * n]
+        return list(zip(flat[0::2], flat[1::2])), list(data[1 + 2 * n:])
+
+    def put(self, key: str, plan: Tuple[List[Tuple[int, int]], List[int]]):
+        if not self.enabled:
+            return
+        picks, touched = plan
+        data = array('i', [len(picks)])
+        for i, k in picks:
+            data.append(i)
+            data.append(k)
+        data.extend(touched)
+        self._write(self._path(key), data.tobytes())
+
+    def get_run(self, key: str) -> Optional[Tuple[Dict[str, List[Parcel]], Set[str], List[str]]]:
+        """The cached (assignments, unassigned, rider_ids) of a whole run, or None."""
+        raw = self._read(os.path.join(self.directory, key + '.run'))
+        try:
+            data = json.loads(raw)
+            columns = data['parcels'] + [data['weights']]
+            counts = [(rider_id, count) for rider_id, count in data['counts']]
+            if len(columns) != 6 or {len(column) for column in columns} != {sum(count for _, count in counts)}:
+                raise ValueError('columns and counts disagree')
+            rows = iter(zip(*columns))  # Columns back into parcels, in order
+            assignments = {rider_id: [Parcel(*next(rows)) for _ in range(count)] for rider_id, count in counts}
+            result = assignments, set(data['unassigned']), list(data['riders'])
+        except (TypeError, ValueError, KeyError):  # Missing, a half-written leftover, or not ours
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put_run(self, key: str, assignments: Dict[str, List[Parcel]], unassigned: Set[str], rider_ids: List[str]):
+        if not self.enabled:
+            return
+        parcels = [p for rider_parcels in assignments.values() for p in rider_parcels]
+        data = {
+            'counts': [[rider_id, len(rider_parcels)] for rider_id, rider_parcels in assignments.items()],
+            'parcels': [[p.parcel_id for p in parcels], [p.recipient for p in parcels], [p.priority for p in parcels],
+                        [p.hub_id for p in parcels], [p.destination for p in parcels]],
+            'weights': [p.weight_kg for p in parcels],
+            'unassigned': sorted(unassigned),
+            'riders': rider_ids,
+        }
+        raw = json.dumps(data).encode('utf-8')
+        if len(raw) > self.max_bytes // 4:
+            return  # Too big: keeping it would push most other entries out
+        self._write(os.path.join(self.directory, key + '.run'), raw)
+
+    def _entries(self, suffixes: Tuple[str, ...]) -> List[os.DirEntry]:
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith(suffixes)]
+        except OSError:
+            return []
+
+    def trim(self) -> int:
+        """Delete the least recently used plans and runs beyond max_entries or max_bytes, and stale .tmp leftovers.
+
+        Returns how many files were deleted.
+        """
+        if not self.enabled:
+            return 0
+        entries, extra = [], []
+        stale_ns = time.time_ns() - STALE_TMP_SECONDS * 10 ** 9
+        for entry in self._entries(('.plan', '.run', '.tmp')):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue  # Deleted by another run meanwhile
+            if entry.name.endswith('.tmp'):
+                if st.st_mtime_ns < stale_ns:  # Left by a run that died mid-write
+                    extra.append(entry.path)
+            else:
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        entries.sort()  # Least recently used first
+        count, total = len(entries), sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            extra.append(path)
+            count -= 1
+            total -= size
+        for path in extra:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass  # Another run got there first
+        return len(extra)
+
+    def clear(self):
+        for entry in self._entries(('.plan', '.run', '.tmp')):
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
@@ -1,28 +1,311 @@
 
-import argparse
 import sys
-from engine import load_hubs, load_parcels, load_riders, load_pickups, assign_parcels, express_then_normal, heavy_first, RiderLoadIterator
-from models import Parcel
+# Everything else is imported inside the function that needs it, so `--version` or a quick
+# `query` doesn't pay for loading the whole engine. Like only unpacking the tools for today's job.
 
-def main():
+VERSION = '0.1.0'
+
+HELP = """usage: cli.py --hubs HUBS --parcels PARCELS --riders RIDERS [--pickups PICKUPS] [options]
+       cli.py snapshot build ... | serve ... | query ... | follow ...
+
+options:
+  --assign               assign parcels to riders and print each rider's load
+  --strategy NAME        round_robin, first_fit_decreasing, best_fit or worst_fit
+  --compare-strategies   run every strategy and compare unassigned counts
+  --jobs N               worker processes for loading and --assign
+  --improve-ms MS        after assigning, spend up to MS ms moving/swapping parcels to fit unassigned ones
+  --no-cache             plan every hub again (also --cache-dir, --cache-size, --cache-mb)
+  --preview [--rider ID] show parcels in delivery order (--threshold KG)
+  --snapshot FILE        binary snapshot to load from
+  --trace OUT.json       write a Chrome trace of where the time goes
+  --validate             check every parcel row first, stop with line numbers if any is bad
+  --version              print the version and exit
+Run a subcommand with --help for its options.
+"""
+
+def snapshot_command(argv):
+    """courierlite snapshot build --hubs ... --parcels ... --riders ... [--pickups ...] --out FILE"""
+    import argparse
+    from snapshot import build_snapshot
+    parser = argparse.ArgumentParser(prog='courierlite snapshot')
+    sub = parser.add_subparsers(dest='action', required=True)
+    build = sub.add_parser('build', help='write a binary snapshot of the CSVs')
+    build.add_argument('--hubs', required=True)
+    build.add_argument('--parcels', required=True)
+    build.add_argument('--riders', required=True)
+    build.add_argument('--pickups')
+    build.add_argument('--out', required=True)
+    args = parser.parse_args(argv)
+    count = build_snapshot(args.out, args.hubs, args.parcels, args.riders, args.pickups)
+    print(f"Snapshot {args.out}: {count} parcels")
+
+def load_from_snapshot(args):
+    """Use the snapshot if it still matches the CSVs, otherwise rebuild it and use what was just loaded."""
+    from snapshot import open_snapshot, write_snapshot
+    sources = (args.hubs, args.parcels, args.riders, args.pickups)
+    snap = open_snapshot(args.snapshot, *sources)
+    if snap is None:
+        # Not opened again: a CSV that changed during the build (rows appended to the parcels feed,
+        # say) already makes the new snapshot stale. This run uses the loaded data; the next one rebuilds.
+        return write_snapshot(args.snapshot, *sources)
+    return snap.hubs, snap.parcels, snap.riders, snap.pickups
+
+def serve_command(argv):
+    """courierlite serve --socket /tmp/courier.sock --hubs ... --parcels ... --riders ..."""
+    import argparse
+    from server import DispatchState, serve
+    from strategies import STRATEGIES
+    parser = argparse.ArgumentParser(prog='courierlite serve')
+    parser.add_argument('--socket', required=True)
+    parser.add_argument('--hubs', required=True)
+    parser.add_argument('--parcels', required=True)
+    parser.add_argument('--riders', required=True)
+    parser.add_argument('--pickups')
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='round_robin')
+    parser.add_argument('--threshold', type=float, default=2.0)
+    args = parser.parse_args(argv)
+    from logsetup import setup_logging
+    setup_logging()
+    state = DispatchState(args.hubs, args.parcels, args.riders, args.pickups, args.strategy, args.threshold)
+    print(f"Serving on {args.socket}")
+    serve(args.socket, state)
+
+def query_command(argv):
+    """courierlite query --socket /tmp/courier.sock PREVIEW R1"""
+    import argparse
+    import json
+    from server import DispatchClient
+    parser = argparse.ArgumentParser(prog='courierlite query')
+    parser.add_argument('--socket', required=True)
+    parser.add_argument('request', nargs='+', help='ASSIGN | PREVIEW <rider> | WHERE <parcel> | RELOAD | PING')
+    args = parser.parse_args(argv)
+    client = DispatchClient(args.socket)
+    try:
+        print(json.dumps(client.request(' '.join(args.request)), indent=2))
+    finally:
+        client.close()
+
+def follow_command(argv):
+    """courierlite follow --hubs ... --riders ... [--tail parcels.csv] [--socket /tmp/intake.sock]"""
+    import argparse
+    import asyncio
+    from engine import load_hubs, load_riders, load_pickups
+    from live import LiveAssigner, LivePipeline, run_live
+    parser = argparse.ArgumentParser(prog='courierlite follow')
+    parser.add_argument('--hubs', required=True)
+    parser.add_argument('--riders', required=True)
+    parser.add_argument('--pickups')
+    parser.add_argument('--tail', help='CSV file to follow as it grows')
+    parser.add_argument('--socket', help='Unix socket that accepts parcel CSV lines')
+    parser.add_argument('--max-queue', type=int, default=1000, help='parcels waiting before readers are paused')
+    parser.add_argument('--max-batch', type=int, default=256, help='most parcels assigned in one go')
+    parser.add_argument('--poll', type=float, default=0.2, help='seconds between checks of the followed file')
+    args = parser.parse_args(argv)
+    if not args.tail and not args.socket:
+        parser.error('give --tail and/or --socket')
+    from logsetup import setup_logging
+    setup_logging()
+    riders = load_riders(args.riders)
+    pickups = load_pickups(args.pickups, load_hubs(args.hubs))
+
+    def show(parcel, rider_id):
+        print(f"{parcel.parcel_id} -> {rider_id or 'UNASSIGNED'}", flush=True)
+
+    pipeline = LivePipeline(LiveAssigner(riders, pickups), args.max_queue, args.max_batch, on_result=show)
+    try:
+        asyncio.run(run_live(pipeline, args.tail, args.socket, args.poll))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(pipeline.stats.summary(), file=sys.stderr)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv in (['--version'], ['-V']):  # Fast path: nothing to load
+        print(f"courierlite {VERSION}")
+        return
+    if argv in (['--help'], ['-h']):  # Same: a fixed text, no argparse
+        print(HELP, end='')
+        return
+    if argv and argv[0] == 'snapshot':
+        return snapshot_command(argv[1:])
+    if argv and argv[0] == 'serve':
+        return serve_command(argv[1:])
+    if argv and argv[0] == 'query':
+        return query_command(argv[1:])
+    if argv and argv[0] == 'follow':
+        return follow_command(argv[1:])
+
+    import argparse
+    from strategies import STRATEGIES
     parser = argparse.ArgumentParser()
     parser.add_argument('--hubs', required=True)
     parser.add_argument('--parcels', required=True)
     parser.add_argument('--riders', required=True)
     parser.add_argument('--pickups')
     parser.add_argument('--assign', action='store_true')
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='round_robin')
+    parser.add_argument('--compare-strategies', action='store_true')
+    parser.add_argument('--jobs', type=int, default=1, help='worker processes for loading big files and for --assign (hubs are split between them)')
+    parser.add_argument('--improve-ms', type=float, default=0, metavar='MS',
+                        help='after assigning, spend up to MS milliseconds moving and swapping parcels between riders to fit unassigned ones')
+    parser.add_argument('--no-cache', action='store_true', help="plan every hub again, even if its input hasn't changed")
+    parser.add_argument('--cache-dir', help='where hub plans are kept (default ~/.cache/courierlite)')
+    parser.add_argument('--cache-size', type=int, default=4096, help='most cache entries kept before the oldest are dropped')
+    parser.add_argument('--cache-mb', type=int, default=256, metavar='MB', help='most disk space the cache may use before the oldest entries are dropped')
     parser.add_argument('--threshold', type=float, default=2.0)
     parser.add_argument('--preview', action='store_true')
     parser.add_argument('--rider')
-    args = parser.parse_args()
+    parser.add_argument('--snapshot', help='binary snapshot to load from (rebuilt when the CSVs change)')
+    parser.add_argument('--trace', metavar='OUT.json', help='write a Chrome trace of where the time goes')
+    parser.add_argument('--log-config', metavar='FILE', help='logging config such as courierlite/logging.conf (default: warnings to stderr)')
+    parser.add_argument('--out', metavar='FILE', help='write every parcel\'s rider, hub, sequence and load to a .csv or .jsonl file')
+    parser.add_argument('--validate', action='store_true', help='check the whole parcels file first and stop (exit 1) if any row is bad')
+    parser.add_argument('--version', '-V', action='version', version=f'courierlite {VERSION}')
+    args = parser.parse_args(argv)
+    if args.out and not args.out.endswith(('.csv', '.jsonl')):
+        parser.error('--out must end in .csv or .jsonl')
 
-    hubs = load_hubs(args.hubs)
-    parcels = load_parcels(args.parcels)
-    riders = load_riders(args.riders)
-    pickups = load_pickups(args.pickups, hubs)
+    import tracing
+    if args.trace:
+        tracing.enable()
+    try:
+        with tracing.span('cli.main'):
+            run(args)
+    finally:
+        if args.trace:
+            tracing.disable().write(args.trace)
+
+def _big_stdout():
+    """stdout with a 1 MB buffer, so many small writes become a few big ones."""
+    sys.stdout.flush()  # Anything printed before comes first
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):  # Not a real file (captured in a test, for example)
+        import contextlib
+        return contextlib.nullcontext(sys.stdout)
+    return open(fd, 'w', buffering=1 << 20, encoding=sys.stdout.encoding, closefd=False)
+
+def _run_sources(args) -> dict:
+    """Every input file of a run, for cache.run_key. Globs are expanded, so a new shard changes the key."""
+    from shards import expand_paths
+    return {'hubs': [args.hubs], 'parcels': expand_paths(args.parcels), 'riders': expand_paths(args.riders),
+            'pickups': [args.pickups]}
+
+def run(args):
+    from logsetup import setup_logging
+    setup_logging(args.log_config)  # Log records go through a queue, so parsing never waits on the log file
+    from tracing import span
+    # Whole-run cache: same input files and strategy as an earlier run -> print its answer, load nothing.
+    # Only for plain --assign/--preview runs; the other options need the data loaded (or, for
+    # --improve-ms, may give a different answer each time).
+    run_key = None
+    cache = None  # One ResultCache for the whole run, so a folder that can't be used is only warned about once
+    if not args.no_cache and (args.assign or args.preview or args.out):
+        from cache import ResultCache
+        cache = ResultCache(args.cache_dir, args.cache_size, args.cache_mb << 20)
+    if (cache is not None and cache.enabled and (args.assign or args.preview) and not args.out
+            and not args.compare_strategies and not args.validate and not args.improve_ms > 0):
+        from cache import run_key as make_run_key
+        with span('run_cache') as s:
+            try:
+                run_key = make_run_key(args.strategy, _run_sources(args))
+            except FileNotFoundError:
+                pass  # A glob that matches nothing: the loaders below report it as usual
+            cached = cache.get_run(run_key) if run_key else None
+            s.set(hit=cached is not None)
+        if cached is not None:
+            show_results(args, *cached)
+            return
+    from engine import load_hubs, load_parcels, load_riders, load_pickups, assign_parcels, iter_assignments, compare_strategies
+    if args.validate:
+        from engine import DataFormatError, DomainRuleError
+        from validate import validate_parcels
+        from shards import expand_paths
+        with span('validate') as s:
+            hubs, riders = load_hubs(args.hubs), load_riders(args.riders, args.jobs)
+            reports = [validate_parcels(path, hubs, riders) for path in expand_paths(args.parcels)]  # One per shard
+            s.set(items=sum(report.rows for report in reports))
+        for report in reports:
+            print(report, file=sys.stderr)
+        try:
+            for report in reports:
+                report.raise_for_errors()
+        except (DataFormatError, DomainRuleError) as e:
+            sys.exit(f"{type(e).__name__}: fix the lines above, nothing was assigned")
+    if args.snapshot:
+        with span('load_snapshot') as s:
+            hubs, parcels, riders, pickups = load_from_snapshot(args)
+            s.set(items=len(parcels))
+    else:
+        with span('load_hubs') as s:
+            hubs = load_hubs(args.hubs)
+            s.set(items=len(hubs.ids()))
+        with span('load_parcels') as s:
+            parcels = load_parcels(args.parcels, args.jobs)
+            s.set(items=len(parcels.ids()))
+        with span('load_riders') as s:
+            riders = load_riders(args.riders, args.jobs)
+            s.set(items=len(riders.ids()))
+        with span('load_pickups') as s:
+            pickups = load_pickups(args.pickups, hubs)
+            s.set(items=len(pickups))
+
+    if args.compare_strategies:
+        print("strategy | unassigned | seconds")
+        for name, unassigned_count, seconds in compare_strategies(hubs, riders, parcels, pickups):
+            print(f"{name} | {unassigned_count} | {seconds:.4f}")
+
+    def report_recovered(recovered):
+        print(f"Recovered {recovered} unassigned parcels in {args.improve_ms:g} ms", file=sys.stderr)
+
+    def assign():
+        assignments, unassigned = assign_parcels(hubs, riders, parcels, pickups, strategy=args.strategy, jobs=args.jobs, cache=cache)
+        if args.improve_ms > 0:
+            from improve import improve_assignments
+            with span('improve') as s:
+                assignments, unassigned, recovered = improve_assignments(riders, parcels, assignments, unassigned, args.improve_ms)
+                s.set(items=recovered)
+            report_recovered(recovered)
+        return assignments, unassigned
+
+    assignments = None
+    if args.out:
+        from export import AssignmentWriter
+        keep = args.assign or args.preview  # Only hold on to the result if something below prints it
+        assignments, unassigned = ({}, set()) if keep else (None, None)
+        improver = None
+        if args.improve_ms > 0:
+            from improve import HubImprover
+            improver = HubImprover(riders, args.improve_ms, len(riders.grouped_by_hub()))
+        with span('export') as s, AssignmentWriter(args.out) as writer:
+            for hub_id, hub_assignments, hub_unassigned in iter_assignments(hubs, riders, parcels, pickups, args.strategy,
+                                                                            args.jobs, cache):
+                if improver is not None:  # Improve each hub before it's written (only improving counts against the budget)
+                    hub_assignments, placed = improver.improve(hub_id, hub_assignments, map(parcels.get, hub_unassigned))
+                    hub_unassigned = hub_unassigned - placed
+                writer.write_hub(hub_id, hub_assignments, hub_unassigned)  # Written as soon as the hub is done
+                if keep:
+                    assignments.update(hub_assignments)
+                    unassigned |= hub_unassigned
+            s.set(items=writer.rows)
+        print(f"Wrote {writer.rows} rows to {args.out}", file=sys.stderr)
+        if improver is not None:
+            report_recovered(improver.recovered)
+
+    if args.assign or args.preview:
+        rider_ids = [r.rider_id for r in riders.all()]
+        if assignments is None:
+            assignments, unassigned = assign()
+            if run_key is not None:  # Next time, same files: straight from the cache
+                cache.put_run(run_key, assignments, unassigned, rider_ids)
+                cache.trim()  # Run entries are big, so check the size limit right away
+        show_results(args, assignments, unassigned, rider_ids)
 
+def show_results(args, assignments, unassigned, rider_ids):
+    """Print what --assign and --preview ask for. rider_ids: every rider, for a preview without --rider."""
+    from tracing import span
     if args.assign:
-        assignments, unassigned = assign_parcels(hubs, riders, parcels, pickups)
         for rider_id, rider_parcels in sorted(assignments.items()):
             total_load = sum(p.weight_kg for p in rider_parcels)
             num_parcels = len(rider_parcels)
@@ -31,13 +314,13 @@ def main():
         print("Unassigned:", sorted(unassigned))
 
     if args.preview:
-        target_riders = [args.rider] if args.rider else [r.rider_id for r in riders.all()]
-        for rider_id in target_riders:
-            rider_parcels = assignments.get(rider_id, [])
-            pipeline = heavy_first(args.threshold)(express_then_normal(iter(rider_parcels)))
-            print(f"Preview for {rider_id}:")
-            for p in pipeline:
-                print(f"  {p.parcel_id} ({p.weight_kg}kg)")
+        from preview import PreviewPipeline, by_priority, by_weight, write_previews
+        with span('preview') as s:
+            target_riders = [args.rider] if args.rider else rider_ids
+            pipeline = PreviewPipeline(by_weight(args.threshold), by_priority())  # Heavy first, EXPRESS first within each
+            with _big_stdout() as out:
+                lines = write_previews(out, assignments, target_riders, pipeline)
+            s.set(riders=len(target_riders), items=lines)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
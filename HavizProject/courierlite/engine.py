@@ -1,8 +1,23 @@
+from __future__ import annotations  # Type hints stay as text, nothing is built when the module loads
 import csv  # For reading CSV files, like spreadsheets
+from array import array  # Compact lists of numbers
 import logging  # For writing notes about what happens, like a diary
+import os  # For file paths
+import time  # For the stopwatch in compare_strategies
+from bisect import bisect_left, bisect_right, insort  # Keep lists sorted without re-sorting
+from itertools import accumulate  # Running totals
+from operator import attrgetter
 from collections import defaultdict  # A smart list that groups things
-from typing import Dict, List, Set, Iterator, Generator, Tuple, Optional  # Helps with types
-from models import Hub, Parcel, Rider, PickupPoint, CampusKiosk, DormLocker, OfficeDesk  # Import our blueprints
+from typing import TYPE_CHECKING, Dict, List, Set, Iterator, Generator, Tuple, Optional, Union  # Helps with types
+from logsetup import RowErrors  # Bad rows are counted, then summed up in one warning
+from shards import FileMark, Layout, expand_paths, iter_rows, mark_file, read_appended  # Globs of files, big files parsed in pieces, fast scans of plain CSVs
+from models import Hub, Parcel, Rider, PickupPoint, CampusKiosk, DormLocker, OfficeDesk, parse_pickup  # Import our blueprints
+from store import ParcelStore  # Column-based parcels for big feeds
+from preview import PreviewPipeline, by_priority, by_weight  # Delivery order for previews
+from strategies import STRATEGIES, get_strategy  # Different ways to pack riders' bags
+from tracing import span  # Stopwatch for each step (free when tracing is off)
+if TYPE_CHECKING:
+    from cache import ResultCache  # Only for the hints; imported for real when a cache is used
 
 logger = logging.getLogger(__name__)  # Sets up the diary
 
@@ -24,6 +39,9 @@ class HubRepo:
     def add(self, obj: Hub):
         self._data[obj.get_id()] = obj
 
+    def remove(self, id: str) -> Optional[Hub]:
+        return self._data.pop(id, None)
+
     def get(self, id: str) -> Optional[Hub]:
         return self._data.get(id)
 
@@ -37,13 +55,65 @@ class HubRepo:
         return set(self._data.keys())
 
 # Same for parcels and riders – just copy-paste the pattern!
+# They also keep indexes: ready-made groups (like "all parcels at H2"), updated on every add/remove,
+# so nobody has to scan everything to find them. Each group is a dict used as an ordered set.
 class ParcelRepo:
-    """Box for parcels."""
+    """Box for parcels, indexed by hub, priority, (hub, priority), destination and pickup."""
     def __init__(self):
         self._data: Dict[str, Parcel] = {}
+        self._by_hub: Dict[str, Dict[str, Parcel]] = {}
+        self._by_priority: Dict[str, Dict[str, Parcel]] = {}
+        self._by_hub_priority: Dict[Tuple[str, str], Dict[str, Parcel]] = {}
+        self._by_destination: Dict[str, Dict[str, Parcel]] = {}
+        self._by_pickup: Dict[str, Dict[str, Parcel]] = {}
+        self.source: Optional[str] = None  # File or glob it was loaded from (set by load_parcels)
+        self.marks: Dict[str, FileMark] = {}  # How far each file has been read, for load_appended
+
+    def _index_keys(self, obj: Parcel):
+        yield self._by_hub, obj.hub_id
+        yield self._by_priority, obj.priority
+        yield self._by_hub_priority, (obj.hub_id, obj.priority)
+        yield self._by_destination, obj.destination
+        if obj.pickup_id is not None:
+            yield self._by_pickup, obj.pickup_id
 
     def add(self, obj: Parcel):
-        self._data[obj.get_id()] = obj
+        id = obj.get_id()
+        old = self._data.get(id)
+        if old is not None:
+            self._unindex(old)
+        self._data[id] = obj
+        for index, key in self._index_keys(obj):
+            group = index.get(key)
+            if group is None:
+                group = index[key] = {}
+            group[id] = obj
+
+    def copy(self) -> 'ParcelRepo':
+        """A separate repo with the same parcels: adding to one doesn't change the other.
+
+        The Parcel objects themselves are shared (nothing changes a Parcel once it's made).
+        """
+        repo = ParcelRepo()
+        repo._data = dict(self._data)
+        for name in ('_by_hub', '_by_priority', '_by_hub_priority', '_by_destination', '_by_pickup'):
+            setattr(repo, name, {key: dict(group) for key, group in getattr(self, name).items()})
+        repo.source, repo.marks = self.source, dict(self.marks)
+        return repo
+
+    def _unindex(self, obj: Parcel):
+        id = obj.get_id()
+        for index, key in self._index_keys(obj):
+            group = index[key]
+            del group[id]
+            if not group:
+                del index[key]
+
+    def remove(self, id: str) -> Optional[Parcel]:
+        obj = self._data.pop(id, None)
+        if obj is not None:
+            self._unindex(obj)
+        return obj
 
     def get(self, id: str) -> Optional[Parcel]:
         return self._data.get(id)
@@ -57,13 +127,73 @@ class ParcelRepo:
     def ids(self) -> Set[str]:
         return set(self._data.keys())
 
+    def by_hub(self, hub_id: str) -> List[Parcel]:
+        return list(self._by_hub.get(hub_id, {}).values())
+
+    def by_priority(self, priority: str) -> List[Parcel]:
+        return list(self._by_priority.get(priority.upper(), {}).values())
+
+    def by_hub_priority(self, hub_id: str, priority: str) -> List[Parcel]:
+        return list(self._by_hub_priority.get((hub_id, priority.upper()), {}).values())
+
+    def by_destination(self, destination: str) -> List[Parcel]:
+        return list(self._by_destination.get(destination, {}).values())
+
+    def by_pickup(self, pickup_id: str) -> List[Parcel]:
+        return list(self._by_pickup.get(pickup_id, {}).values())
+
+    def hub_ids(self) -> List[str]:
+        """Hubs that have at least one parcel."""
+        return list(self._by_hub)
+
+    def find(self, hub_id: Optional[str] = None, priority: Optional[str] = None,
+             destination: Optional[str] = None, pickup_id: Optional[str] = None) -> List[Parcel]:
+        """Parcels matching every given field, e.g. find(hub_id='H2', priority='EXPRESS', destination='Sabiiti').
+
+        Starts from the smallest matching index group and only checks the parcels in it.
+        """
+        priority = priority.upper() if priority is not None else None
+        groups = []
+        if hub_id is not None and priority is not None:
+            groups.append(self._by_hub_priority.get((hub_id, priority), {}))
+        elif hub_id is not None:
+            groups.append(self._by_hub.get(hub_id, {}))
+        elif priority is not None:
+            groups.append(self._by_priority.get(priority, {}))
+        if destination is not None:
+            groups.append(self._by_destination.get(destination, {}))
+        if pickup_id is not None:
+            groups.append(self._by_pickup.get(pickup_id, {}))
+        if not groups:
+            return self.all()
+        smallest = min(groups, key=len)
+        others = [g for g in groups if g is not smallest]
+        return [p for id, p in smallest.items() if all(id in g for g in others)]
+
 class RiderRepo:
-    """Box for riders."""
+    """Box for riders, indexed by home hub (each hub's riders kept sorted by rider ID)."""
     def __init__(self):
         self._data: Dict[str, Rider] = {}
+        self._by_hub: Dict[str, List[Rider]] = {}
 
     def add(self, obj: Rider):
+        old = self._data.get(obj.get_id())
+        if old is not None:
+            self._unindex(old)
         self._data[obj.get_id()] = obj
+        insort(self._by_hub.setdefault(obj.home_hub_id, []), obj, key=_rider_id)
+
+    def _unindex(self, obj: Rider):
+        group = self._by_hub[obj.home_hub_id]
+        group.pop(bisect_left(group, obj.rider_id, key=_rider_id))
+        if not group:
+            del self._by_hub[obj.home_hub_id]
+
+    def remove(self, id: str) -> Optional[Rider]:
+        obj = self._data.pop(id, None)
+        if obj is not None:
+            self._unindex(obj)
+        return obj
 
     def get(self, id: str) -> Optional[Rider]:
         return self._data.get(id)
@@ -77,87 +207,198 @@ class RiderRepo:
     def ids(self) -> Set[str]:
         return set(self._data.keys())
 
+    def by_hub(self, hub_id: str) -> List[Rider]:
+        """Riders based at hub_id, sorted by rider ID."""
+        return list(self._by_hub.get(hub_id, []))
+
+    def grouped_by_hub(self) -> Dict[str, List[Rider]]:
+        """{hub_id: riders sorted by ID} for every hub with riders."""
+        return {hub_id: list(group) for hub_id, group in self._by_hub.items()}
+
+def _rider_id(rider: Rider) -> str:
+    return rider.rider_id
+
 # Load functions: Read from CSV files, like importing a list.
 def load_hubs(path: str) -> HubRepo:
     """Load hubs from CSV. Like reading a list of stores."""
     repo = HubRepo()
+    errors = RowErrors(path)
     try:
         with open(path, 'r') as f:
             reader = csv.reader(f)
             next(reader)  # Skip the header row
             for row in reader:
                 if len(row) != 3:
-                    logger.warning(f"Bad row: {row}")  # Note it and skip
+                    errors.add('wrong_columns', reader.line_num, row)  # Note it and skip
                     continue
                 hub_id, hub_name, campus = row
                 repo.add(Hub(hub_id, hub_name, campus))
     except Exception as e:
-        logger.error(f"Oops loading hubs: {e}")
+        logger.error("Oops loading hubs: %s", e)
+    errors.report(logger)  # One summary line, however many rows were bad
     return repo
 
+PARCEL_LAYOUT = Layout(width=6, numbers=(5,))  # weight_kg is a number
+RIDER_LAYOUT = Layout(width=4, numbers=(2,))  # max_load_kg is a number
+
 # Same for parcels and riders – they check for bad data and skip.
-def load_parcels(path: str) -> ParcelRepo:
-    """Load parcels from CSV."""
+def check_parcel_row(row: List[str], errors: Optional[RowErrors] = None,
+                     line_no: int = 0) -> Optional[Tuple[str, str, str, str, str, float]]:
+    """One CSV row as (parcel_id, recipient, priority, hub_id, destination, weight_kg), or None if it's bad.
+
+    Bad rows are counted in errors when given, otherwise logged one by one.
+    """
+    if len(row) != 6:
+        if errors is not None:
+            errors.add('wrong_columns', line_no, row)
+        else:
+            logger.warning("Bad row: %s", row)  # %s: only turned into text if the warning is shown
+        return None
+    parcel_id, recipient, priority, hub_id, destination, weight_kg = row
+    try:
+        weight_kg = float(weight_kg)  # Make sure it's a number
+    except ValueError:
+        if errors is not None:
+            errors.add('bad_weight', line_no, row)
+        else:
+            logger.warning("Bad weight: %s", row)
+        return None
+    return parcel_id, recipient, priority, hub_id, destination, weight_kg
+
+def _parcel_rows(path: str, jobs: int = 1) -> Iterator[Tuple[str, str, str, str, str, float]]:
+    """Checked parcel rows from CSV: (parcel_id, recipient, priority, hub_id, destination, weight_kg).
+
+    path may be a glob (data/parcels-*.csv); jobs > 1 parses big files in several processes.
+    """
+    return iter_rows(path, check_parcel_row, jobs, PARCEL_LAYOUT)
+
+def iter_parcels(path: str, chunk_size: int = 10000, jobs: int = 1) -> Iterator[List[Parcel]]:
+    """Stream parcels from CSV in lists of up to chunk_size. Like reading a book page by page."""
+    chunk = []
+    for row in _parcel_rows(path, jobs):
+        chunk.append(Parcel(*row))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def load_parcels(path: str, jobs: int = 1) -> ParcelRepo:
+    """Load parcels from CSV, or from every file matching a glob like data/parcels-*.csv.
+
+    jobs > 1 parses in that many processes; the parcels still come out in file order.
+    """
     repo = ParcelRepo()
+    repo.source = path
     try:
-        with open(path, 'r') as f:
-            reader = csv.reader(f)
-            next(reader)
-            for row in reader:
-                if len(row) != 6:
-                    logger.warning(f"Bad row: {row}")
-                    continue
-                parcel_id, recipient, priority, hub_id, destination, weight_kg = row
-                try:
-                    weight_kg = float(weight_kg)  # Make sure it's a number
-                    repo.add(Parcel(parcel_id, recipient, priority, hub_id, destination, weight_kg))
-                except ValueError:
-                    logger.warning(f"Bad weight: {row}")
+        marks = {file: mark_file(file) for file in expand_paths(path)}  # Before reading: rows added meanwhile get read again, never missed
+        for chunk in iter_parcels(path, jobs=jobs):
+            for parcel in chunk:
+                repo.add(parcel)
+        repo.marks = marks
     except Exception as e:
-        logger.error(f"Oops loading parcels: {e}")
+        logger.error("Oops loading parcels: %s", e)
     return repo
 
-def load_riders(path: str) -> RiderRepo:
-    """Load riders from CSV."""
+def load_appended(repo: ParcelRepo) -> Optional[Tuple[ParcelRepo, List[Parcel], Set[str]]]:
+    """Rows appended to repo's file(s) since they were read. Returns (new repo, new parcels, hubs that changed).
+
+    repo itself is left alone: the new repo is a copy with the parcels added and the marks moved on
+    (or repo itself when nothing changed). So anyone still using repo sees the old data, and if the
+    caller drops the new repo the same rows are read again next time.
+    Returns None if a file was truncated, rewritten or removed: call load_parcels again then.
+    New files matching a glob are read whole.
+    """
+    if repo.source is None or not repo.marks:
+        return None
+    paths = expand_paths(repo.source)
+    if not set(repo.marks) <= set(paths):
+        return None  # A file we had read is gone
+    rows, marks = [], {}
+    for path in paths:  # Read every file before building anything
+        mark = repo.marks.get(path)
+        if mark is None:
+            marks[path] = mark_file(path)
+            rows += iter_rows(path, check_parcel_row, 1, PARCEL_LAYOUT)
+            continue
+        appended = read_appended(path, mark, check_parcel_row, PARCEL_LAYOUT)
+        if appended is None:
+            return None
+        new_rows, marks[path] = appended
+        rows += new_rows
+    if not rows and marks == repo.marks:
+        return repo, [], set()
+    new_repo = repo.copy()
+    added, hub_ids = [], set()
+    for row in rows:
+        parcel = Parcel(*row)
+        old = new_repo.get(parcel.parcel_id)
+        if old is not None:
+            hub_ids.add(old.hub_id)  # Same ID again: the new row wins, and its old hub changes too
+        new_repo.add(parcel)
+        added.append(parcel)
+        hub_ids.add(parcel.hub_id)
+    new_repo.marks = marks
+    return new_repo, added, hub_ids
+
+def load_parcel_store(path: str, jobs: int = 1) -> ParcelStore:
+    """Load parcels from CSV (or a glob) straight into columns, no Parcel objects."""
+    store = ParcelStore()
+    try:
+        for row in _parcel_rows(path, jobs):
+            store.append(*row)
+    except Exception as e:
+        logger.error("Oops loading parcels: %s", e)
+    return store
+
+def check_rider_row(row: List[str], errors: Optional[RowErrors] = None,
+                    line_no: int = 0) -> Optional[Tuple[str, str, float, str]]:
+    """One CSV row as (rider_id, name, max_load_kg, home_hub_id), or None if it's bad."""
+    if len(row) != 4:
+        if errors is not None:
+            errors.add('wrong_columns', line_no, row)
+        return None
+    rider_id, name, max_load_kg, home_hub_id = row
+    try:
+        max_load_kg = float(max_load_kg)
+    except ValueError:
+        if errors is not None:
+            errors.add('bad_load', line_no, row)
+        return None
+    return rider_id, name, max_load_kg, home_hub_id
+
+def load_riders(path: str, jobs: int = 1) -> RiderRepo:
+    """Load riders from CSV, or from every file matching a glob. jobs works as in load_parcels."""
     repo = RiderRepo()
     try:
-        with open(path, 'r') as f:
-            reader = csv.reader(f)
-            next(reader)
-            for row in reader:
-                if len(row) != 4:
-                    logger.warning(f"Bad row: {row}")
-                    continue
-                rider_id, name, max_load_kg, home_hub_id = row
-                try:
-                    max_load_kg = float(max_load_kg)
-                    repo.add(Rider(rider_id, name, max_load_kg, home_hub_id))
-                except ValueError:
-                    logger.warning(f"Bad load: {row}")
+        for row in iter_rows(path, check_rider_row, jobs, RIDER_LAYOUT):
+            repo.add(Rider(*row))
     except Exception as e:
-        logger.error(f"Oops loading riders: {e}")
+        logger.error("Oops loading riders: %s", e)
     return repo
 
 def load_pickups(path: Optional[str], hubs: HubRepo) -> Dict[str, PickupPoint]:
     """Load pickups or use defaults. Like setting up special spots."""
     pickups = {}
     if path:
+        errors = RowErrors(path)
         try:
             with open(path, 'r') as f:
                 reader = csv.reader(f)
                 next(reader)
                 for row in reader:
                     if len(row) != 4:
-                        logger.warning(f"Bad row: {row}")
+                        errors.add('wrong_columns', reader.line_num, row)
                         continue
                     pickup_id, label, hub_id, bias = row
                     try:
                         bias = int(bias)
                         pickups[pickup_id] = PickupPoint(pickup_id, hub_id, label, bias)
                     except ValueError:
-                        logger.warning(f"Bad bias: {row}")
+                        errors.add('bad_bias', reader.line_num, row)
         except FileNotFoundError:
             logger.warning("No pickups file, using defaults.")
+        errors.report(logger)
     if not pickups:
         # Defaults for UCU hostels
         hostel_hubs = [h for h in hubs.all() if h.campus == 'UCU']
@@ -167,55 +408,263 @@ def load_pickups(path: Optional[str], hubs: HubRepo) -> Dict[str, PickupPoint]:
             pickups[f'D{i+1}'] = OfficeDesk(f'D{i+1}', hub.hub_id, f'Desk at {hub.hub_name}')
     return pickups
 
-# The big function: Assign parcels to riders, like giving jobs.
-def assign_parcels(hubs: HubRepo, riders: RiderRepo, parcels: ParcelRepo, pickups: Dict[str, PickupPoint]) -> Tuple[Dict[str, List[Parcel]], Set[str]]:
-    """Assign parcels to riders. Rules: Riders only from their hub, don't overload, EXPRESS first."""
-    riders_by_hub = defaultdict(list)  # Group riders by hub
-    for rider in riders.all():
-        riders_by_hub[rider.home_hub_id].append(rider)
-    for hub in riders_by_hub:
-        riders_by_hub[hub].sort(key=lambda r: r.rider_id)  # Sort by ID
-
-    parcels_by_hub = defaultdict(lambda: {'EXPRESS': [], 'NORMAL': []})  # Group parcels
-    for parcel in parcels.all():
-        parcels_by_hub[parcel.hub_id][parcel.priority].append(parcel)
-
-    assignments = defaultdict(list)  # Who gets what
-    unassigned = set()  # Parcels that couldn't be delivered
-
+# Helpers shared by assign_parcels and the chunked driver below.
+def _bias_resolver(pickups: Dict[str, PickupPoint]):
+    """Closure: pickup ID (or None) -> priority bias. Unknown pickup IDs are reported once each."""
+    unknown = set()
+    def bias_of(pickup_id: Optional[str]) -> int:
+        if pickup_id is None:
+            return 0
+        pickup = pickups.get(pickup_id)
+        if pickup is not None:
+            return pickup.base_priority_bias
+        if pickup_id not in unknown:
+            unknown.add(pickup_id)
+            logger.warning("Unknown pickup %s", pickup_id)
+        return 0
+    return bias_of
+
+def _bias_order(ids: List[str], biases, start: int, stop: int) -> List[int]:
+    """Positions start..stop-1, higher bias first, then by parcel ID. One bucket per bias value."""
+    buckets = defaultdict(list)
+    for i in range(start, stop):
+        buckets[biases[i]].append(i)
+    order = []
+    for bias in sorted(buckets, reverse=True):  # Only a handful of distinct biases
+        order += sorted(buckets[bias], key=ids.__getitem__)
+    return order
+
+def _plan_hub(strategy: str, caps: List[float], ids: List[str], biases, weights: List[float], express_count: int) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """Sort one hub's parcels and pack them. Plain data in and out, so it can run in a worker process.
+
+    The first express_count items are EXPRESS, the rest NORMAL. Returns (picks, touched) where
+    picks are (item position, rider position) pairs in the order they were handed out.
+    """
+    order = _bias_order(ids, biases, 0, express_count)
+    order += _bias_order(ids, biases, express_count, len(ids))
+    picks, touched = get_strategy(strategy).fill(caps, [weights[i] for i in order], express_count)
+    return [(order[i], k) for i, k in picks], touched
+
+def _run_plans(jobs: Iterator[Tuple[Tuple, Tuple]], workers: int = 1,
+               cache: Optional[ResultCache] = None) -> Iterator[Tuple[Tuple, Tuple]]:
+    """Run _plan_hub for each ((hub_id, ...), payload). Same order out as in, whether serial or in a pool.
+
+    With a cache, hubs whose exact input was planned before are read back instead of planned again.
+    """
+    if cache is not None:
+        from cache import plan_key
+    if workers <= 1:
+        for context, payload in jobs:
+            key = plan_key(payload) if cache is not None else None
+            plan = cache.get(key) if cache is not None else None
+            if plan is None:
+                with span('plan_hub', cat='assign', hub_id=context[0], parcels=len(payload[2]), riders=len(payload[1])):
+                    plan = _plan_hub(*payload)
+                if cache is not None:
+                    cache.put(key, plan)
+            yield context, plan
+        return
+    contexts, plans, keys, misses = [], [], [], []  # misses: positions that still need planning
+    for context, payload in jobs:
+        key = plan_key(payload) if cache is not None else None
+        plan = cache.get(key) if cache is not None else None
+        if plan is None:
+            misses.append((len(plans), payload))
+        contexts.append(context)
+        plans.append(plan)
+        keys.append(key)
+    if not misses:
+        yield from zip(contexts, plans)
+        return
+    from concurrent.futures import ProcessPoolExecutor  # Several Python processes working at once (slow to import)
+    payloads = [payload for _, payload in misses]
+    chunksize = max(1, len(payloads) // (workers * 4))
+    with span('plan_hubs_pool', cat='assign', hubs=len(payloads), workers=workers):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (position, _), plan in zip(misses, pool.map(_plan_hub, *zip(*payloads), chunksize=chunksize)):
+                plans[position] = plan
+                if cache is not None:
+                    cache.put(keys[position], plan)
+    yield from zip(contexts, plans)
+
+def _collect(hub_riders: List[Rider], items: List, plan: Tuple, parcel_of, id_of) -> Tuple[Dict[str, List[Parcel]], Set[str]]:
+    """Turn a hub plan back into {rider_id: [Parcel, ...]} and the set of unassigned parcel IDs."""
+    picks, touched = plan
+    hub_assignments = {hub_riders[k].rider_id: [] for k in touched}  # Riders we looked at show up, even with nothing
+    placed = set()
+    for i, k in picks:
+        hub_assignments[hub_riders[k].rider_id].append(parcel_of(items[i]))
+        placed.add(i)
+    hub_unassigned = {id_of(item) for i, item in enumerate(items) if i not in placed}
+    return hub_assignments, hub_unassigned
+
+def _parcel_id(p: Parcel) -> str:
+    return p.parcel_id
+
+def _same(p: Parcel) -> Parcel:
+    return p
+
+_weight_kg = attrgetter('weight_kg')
+
+def _object_payload(strategy: str, hub_riders: List[Rider], items: List[Parcel], express_count: int, bias_of) -> Tuple:
+    """_plan_hub arguments for a list of Parcel objects (EXPRESS ones first)."""
+    return (strategy, [r.max_load_kg for r in hub_riders], [p.parcel_id for p in items],
+            array('i', [bias_of(p.pickup_id) for p in items]), [p.weight_kg for p in items], express_count)
+
+def _object_jobs(strategy: str, riders_by_hub: Dict[str, List[Rider]], parcels: ParcelRepo, bias_of) -> Iterator[Tuple[object, Tuple]]:
+    """(context, payload) per hub for Parcel objects."""
     for hub_id, hub_riders in riders_by_hub.items():
         if not hub_riders:
             continue
-        rider_index = 0
-        for priority in ['EXPRESS', 'NORMAL']:
-            hub_parcels = parcels_by_hub[hub_id][priority]
-            # Sort by pickup bias for same priority
-            def sort_key(p):
-                bias = 0
-                if 'PICKUP:' in p.destination:
-                    pickup_id = p.destination.split('PICKUP:')[1]
-                    if pickup_id in pickups:
-                        bias = pickups[pickup_id].base_priority_bias
-                    else:
-                        logger.warning(f"Unknown pickup {pickup_id}")
-                return (-bias, p.parcel_id)  # Higher bias first
-            hub_parcels.sort(key=sort_key)
-
-            for parcel in hub_parcels:
-                assigned = False
-                for _ in range(len(hub_riders)):
-                    rider = hub_riders[rider_index]
-                    current_load = sum(p.weight_kg for p in assignments[rider.rider_id])
-                    if current_load + parcel.weight_kg <= rider.max_load_kg:
-                        assignments[rider.rider_id].append(parcel)
-                        assigned = True
-                        break
-                    rider_index = (rider_index + 1) % len(hub_riders)
-                if not assigned:
-                    unassigned.add(parcel.parcel_id)
-                rider_index = (rider_index + 1) % len(hub_riders)
-
-    return dict(assignments), unassigned
+        express = parcels.by_hub_priority(hub_id, 'EXPRESS')
+        items = express + parcels.by_hub_priority(hub_id, 'NORMAL')  # EXPRESS first, then NORMAL
+        yield (hub_id, hub_riders, items), _object_payload(strategy, hub_riders, items, len(express), bias_of)
+
+def _store_jobs(strategy: str, riders_by_hub: Dict[str, List[Rider]], store: ParcelStore, pickups: Dict[str, PickupPoint]) -> Iterator[Tuple[object, Tuple]]:
+    """(context, payload) per hub for a ParcelStore: works on row numbers, no Parcel objects."""
+    # Bias depends only on the destination, so work it out once per distinct destination
+    bias_of = _bias_resolver(pickups)
+    bias_by_destination = array('i', [bias_of(parse_pickup(d)) for d in store.destinations.values])
+    ids, weights, destination_codes = store.parcel_ids, store.weights, store.destination_codes
+
+    groups = store.group_rows()
+    for hub_id, hub_riders in riders_by_hub.items():
+        if not hub_riders or hub_id not in groups:
+            continue
+        express, normal = groups[hub_id]['EXPRESS'], groups[hub_id]['NORMAL']
+        rows = express + normal
+        payload = (strategy, [r.max_load_kg for r in hub_riders], [ids[row] for row in rows],
+                   array('i', [bias_by_destination[destination_codes[row]] for row in rows]),
+                   [weights[row] for row in rows], len(express))
+        yield (hub_id, hub_riders, rows), payload
+
+# The big function: Assign parcels to riders, like giving jobs.
+def iter_assignments(hubs: HubRepo, riders: RiderRepo, parcels: Union[ParcelRepo, ParcelStore], pickups: Dict[str, PickupPoint],
+                     strategy: str = 'round_robin', jobs: int = 1,
+                     cache: Optional[ResultCache] = None) -> Iterator[Tuple[str, Dict[str, List[Parcel]], Set[str]]]:
+    """Same as assign_parcels, but yields (hub_id, hub_assignments, hub_unassigned) as each hub is done."""
+    get_strategy(strategy)  # Fail early on a bad name
+    riders_by_hub = riders.grouped_by_hub()  # Already grouped and sorted by the repo
+    if isinstance(parcels, ParcelStore):
+        hub_jobs = _store_jobs(strategy, riders_by_hub, parcels, pickups)
+        parcel_of, id_of = parcels.parcel, parcels.parcel_ids.__getitem__
+    else:
+        hub_jobs = _object_jobs(strategy, riders_by_hub, parcels, _bias_resolver(pickups))  # Groups come from the repo's indexes
+        parcel_of, id_of = _same, _parcel_id
+
+    for (hub_id, hub_riders, items), plan in _run_plans(hub_jobs, jobs, cache):
+        hub_assignments, hub_unassigned = _collect(hub_riders, items, plan, parcel_of, id_of)
+        yield hub_id, hub_assignments, hub_unassigned
+    if cache is not None:
+        cache.trim()
+
+def assign_parcels(hubs: HubRepo, riders: RiderRepo, parcels: Union[ParcelRepo, ParcelStore], pickups: Dict[str, PickupPoint],
+                   strategy: str = 'round_robin', jobs: int = 1,
+                   cache: Optional[ResultCache] = None) -> Tuple[Dict[str, List[Parcel]], Set[str]]:
+    """Assign parcels to riders. Rules: Riders only from their hub, don't overload, EXPRESS first.
+
+    strategy picks how riders are chosen at each hub (see strategies.STRATEGIES).
+    jobs > 1 packs hubs in that many worker processes; the answer is the same as jobs=1.
+    cache (a cache.ResultCache) skips planning for hubs whose input hasn't changed.
+    """
+    get_strategy(strategy)  # Fail early on a bad name
+    with span('assign_parcels', cat='assign', strategy=strategy, jobs=jobs) as s:
+        assignments = {}  # Who gets what
+        unassigned = set()  # Parcels that couldn't be delivered
+        hubs_done = 0
+        for _, hub_assignments, hub_unassigned in iter_assignments(hubs, riders, parcels, pickups, strategy, jobs, cache):
+            assignments.update(hub_assignments)
+            unassigned |= hub_unassigned
+            hubs_done += 1
+        if cache is not None:
+            s.set(cache_hits=cache.hits, cache_misses=cache.misses)
+        s.set(hubs=hubs_done, assigned=sum(len(v) for v in assignments.values()), unassigned=len(unassigned))
+    return assignments, unassigned
+
+# Chunked driver: for feeds too big to hold in memory at once.
+def assign_parcels_chunked(riders: RiderRepo, parcels_path: str, pickups: Dict[str, PickupPoint],
+                           chunk_size: int = 10000, strategy: str = 'round_robin',
+                           spill_dir: Optional[str] = None, partitions: int = 256) -> Iterator[Tuple[str, Dict[str, List[Parcel]], Set[str]]]:
+    """Stream a parcels CSV and assign it hub by hub. Same answers as assign_parcels.
+
+    Pass 1 reads the file chunk by chunk and sorts each row, with its row number, into a per-hub spill file.
+    Pass 2 assigns one hub at a time and yields (hub_id, hub_assignments, hub_unassigned),
+    so only one chunk (or one hub, or one partition) plus rider state is in memory, never the whole feed.
+    A parcel_id that appears twice counts once, from its last row (like load_parcels). Inside a hub the
+    later row simply replaces the earlier one. For an ID that moves between hubs, pass 1 also writes
+    (parcel_id, row number, hub) into one of `partitions` files picked by a hash of the ID; each of those
+    is read on its own to find the rows replaced by a later row at another hub, which pass 2 then skips.
+    """
+    import tempfile  # Scratch folders for the spill files
+    get_strategy(strategy)  # Fail early on a bad name
+    riders_by_hub = riders.grouped_by_hub()  # Already grouped and sorted by the repo
+    bias_of = _bias_resolver(pickups)
+
+    with tempfile.TemporaryDirectory(dir=spill_dir, prefix='courierlite-') as tmp:
+        spill_paths: Dict[str, str] = {}  # hub_id -> spill file (row number + parcel row)
+        id_paths: Dict[int, str] = {}  # partition -> (parcel_id, row number, hub_id) rows
+        drop_paths: Dict[str, str] = {}  # hub_id -> row numbers replaced by a later row at another hub
+        hub_pending: Dict[str, list] = {}  # Rows read since the last spill, per file
+        id_pending: Dict[int, list] = {}
+
+        def spill(pending: Dict, paths: Dict, prefix: str):
+            for key, rows in pending.items():  # One file open at a time, however many hubs
+                if key not in paths:
+                    paths[key] = os.path.join(tmp, f'{prefix}-{len(paths)}.csv')
+                with open(paths[key], 'a', newline='') as f:
+                    csv.writer(f).writerows(rows)
+            pending.clear()
+
+        for row_no, row in enumerate(_parcel_rows(parcels_path)):  # Plain rows: Parcel objects are made in pass 2
+            parcel_id, hub_id = row[0], row[3]
+            id_pending.setdefault(hash(parcel_id) % partitions, []).append((parcel_id, row_no, hub_id))
+            if hub_id in riders_by_hub:  # No riders at that hub, assign_parcels skips these too
+                hub_pending.setdefault(hub_id, []).append((row_no,) + row)
+            if row_no % chunk_size == chunk_size - 1:
+                spill(hub_pending, spill_paths, 'hub')
+                spill(id_pending, id_paths, 'ids')
+        spill(hub_pending, spill_paths, 'hub')
+        spill(id_pending, id_paths, 'ids')
+
+        # One partition at a time: which rows lost to a later row of the same ID at a different hub
+        drop_pending: Dict[str, list] = {}
+        for path in id_paths.values():
+            with open(path, newline='') as f:
+                entries = list(csv.reader(f))
+            last_hub = {parcel_id: hub_id for parcel_id, _, hub_id in entries}  # Later rows overwrite earlier ones
+            for parcel_id, row_no, hub_id in entries:
+                if hub_id != last_hub[parcel_id] and hub_id in riders_by_hub:
+                    drop_pending.setdefault(hub_id, []).append((row_no,))
+            del entries, last_hub
+            spill(drop_pending, drop_paths, 'drop')
+
+        for hub_id, hub_riders in riders_by_hub.items():
+            latest: Dict[str, Parcel] = {}  # parcel_id -> parcel from its last row at this hub
+            if hub_id in spill_paths:
+                dropped = set()
+                if hub_id in drop_paths:
+                    with open(drop_paths[hub_id], newline='') as f:
+                        dropped = {row[0] for row in csv.reader(f)}
+                with open(spill_paths[hub_id], newline='') as f:
+                    for row in csv.reader(f):
+                        if row[0] not in dropped:
+                            latest[row[1]] = Parcel(*row[1:6], float(row[6]))  # A repeat inside the hub replaces the earlier row
+            express = [p for p in latest.values() if p.priority == 'EXPRESS']
+            items = express + [p for p in latest.values() if p.priority != 'EXPRESS']
+            latest.clear()
+            plan = _plan_hub(*_object_payload(strategy, hub_riders, items, len(express), bias_of))
+            hub_assignments, hub_unassigned = _collect(hub_riders, items, plan, _same, _parcel_id)
+            yield hub_id, hub_assignments, hub_unassigned
+
+def compare_strategies(hubs: HubRepo, riders: RiderRepo, parcels: ParcelRepo, pickups: Dict[str, PickupPoint],
+                       names: Optional[List[str]] = None) -> List[Tuple[str, int, float]]:
+    """Run each strategy on the same input. Returns (name, unassigned count, seconds) rows."""
+    report = []
+    for name in names or list(STRATEGIES):
+        start = time.perf_counter()
+        _, unassigned = assign_parcels(hubs, riders, parcels, pickups, strategy=name)
+        report.append((name, len(unassigned), time.perf_counter() - start))
+    return report
 
 # Iterator: Like a list you can walk through one by one.
 class RiderLoadIterator:
@@ -237,29 +686,66 @@ class RiderLoadIterator:
         self.index += 1
         return result
 
+# Prefix sums: the running total worked out once, so any point along the route can be looked up.
+class RiderLoadProfile:
+    """Cumulative load after each of a rider's parcels, stored once. Same numbers as RiderLoadIterator.
+
+    profile.load_after(k) is the load after the first k parcels, profile.parcel_over(x) the position
+    of the parcel that takes the load past x kg, and profile[2:5] gives (parcel_id, weight_kg, cumulative) rows.
+    """
+    def __init__(self, rider_id: str, parcels: List[Parcel], cumulative=None):
+        self.rider_id = rider_id
+        self.parcels = parcels
+        if cumulative is None:
+            cumulative = array('d', accumulate(p.weight_kg for p in parcels))
+        self.cumulative = cumulative  # cumulative[i] = load after parcels[0..i]
+
+    def __len__(self) -> int:
+        return len(self.parcels)
+
+    def total(self) -> float:
+        return self.cumulative[-1] if self.parcels else 0.0
+
+    def load_after(self, k: int) -> float:
+        """Load after the first k parcels (k=0 is an empty bag)."""
+        if not 0 <= k <= len(self.parcels):
+            raise IndexError(f"{self.rider_id} has {len(self.parcels)} parcels, not {k}")
+        return self.cumulative[k - 1] if k else 0.0
+
+    def parcel_over(self, limit_kg: float) -> Optional[int]:
+        """Position of the first parcel that takes the load above limit_kg, or None if it never does."""
+        i = bisect_right(self.cumulative, limit_kg)  # Loads only go up, so binary search works
+        return i if i < len(self.parcels) else None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.parcels)))]
+        parcel = self.parcels[index]
+        return parcel.parcel_id, parcel.weight_kg, self.cumulative[index]
+
+    def __iter__(self):
+        return iter(self[:])
+
+def build_load_profiles(assignments: Dict[str, List[Parcel]]) -> Dict[str, RiderLoadProfile]:
+    """RiderLoadProfile for every rider in one pass. All running totals share one array of floats."""
+    totals = array('d')
+    spans = []
+    for rider_id, rider_parcels in assignments.items():
+        start = len(totals)
+        totals.extend(accumulate(map(_weight_kg, rider_parcels)))  # Restarts from 0 for each rider
+        spans.append((rider_id, rider_parcels, start, len(totals)))
+    view = memoryview(totals)  # Slices of a memoryview share the numbers, no copies
+    return {rider_id: RiderLoadProfile(rider_id, rider_parcels, view[start:stop])
+            for rider_id, rider_parcels, start, stop in spans}
+
 # Generators: Like magic pipes that sort parcels.
+# To combine several orderings, use one preview.PreviewPipeline instead of chaining these.
 def express_then_normal(parcels_iter: Iterator[Parcel]) -> Generator[Parcel, None, None]:
     """Generator: EXPRESS first, then NORMAL."""
-    express = []
-    normal = []
-    for p in parcels_iter:
-        if p.priority == 'EXPRESS':
-            express.append(p)
-        else:
-            normal.append(p)
-    yield from express  # "Yield" means give one at a time
-    yield from normal
+    yield from PreviewPipeline(by_priority())(parcels_iter)  # "Yield" means give one at a time
 
 def heavy_first(threshold_kg: float):
     """Closure for heavy first generator. Heavy parcels (>= threshold) first, then light."""
     def generator(parcels_iter: Iterator[Parcel]) -> Generator[Parcel, None, None]:
-        heavy = []
-        light = []
-        for p in parcels_iter:
-            if p.weight_kg >= threshold_kg:
-                heavy.append(p)
-            else:
-                light.append(p)
-        yield from heavy
-        yield from light
+        yield from PreviewPipeline(by_weight(threshold_kg))(parcels_iter)
     return generator
\ No newline at end of file
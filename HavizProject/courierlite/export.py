@@ -0,0 +1,72 @@
+from __future__ import annotations
+import csv
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from models import Parcel
+
+# Export: the full assignment as one row per parcel, for other programs to read.
+# Rows are written hub by hub as soon as a hub is assigned, in one big write per hub,
+# so the file is never built up in memory first. Like sending out each hub's van as soon as it's loaded.
+
+EXPORT_HEADER = ('parcel_id', 'rider_id', 'hub_id', 'sequence', 'cumulative_kg')
+
+
+def hub_rows(hub_id: str, hub_assignments: Dict[str, List[Parcel]],
+             hub_unassigned: Set[str]) -> Iterator[Tuple[str, Optional[str], str, Optional[int], Optional[float]]]:
+    """(parcel_id, rider_id, hub_id, sequence, cumulative_kg) rows for one hub.
+
+    sequence counts from 1 in each rider's delivery list; unassigned parcels have no rider,
+    sequence or load and come last, sorted by ID.
+    """
+    for rider_id, rider_parcels in hub_assignments.items():
+        cumulative = 0.0
+        for sequence, parcel in enumerate(rider_parcels, 1):
+            cumulative += parcel.weight_kg
+            yield parcel.parcel_id, rider_id, hub_id, sequence, round(cumulative, 3)
+    for parcel_id in sorted(hub_unassigned):
+        yield parcel_id, None, hub_id, None, None
+
+
+class AssignmentWriter:
+    """Writes hub rows to a .csv or .jsonl file (picked by the file name)."""
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        if path.endswith('.jsonl'):
+            self.format = 'jsonl'
+        elif path.endswith('.csv'):
+            self.format = 'csv'
+        else:
+            raise ValueError(f"Can't tell the export format of {path}: use .csv or .jsonl")
+        self.file = open(path, 'w', newline='', buffering=buffer_size)  # Big buffer: few large disk writes
+        self.rows = 0
+        if self.format == 'csv':
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(EXPORT_HEADER)
+
+    def write_hub(self, hub_id: str, hub_assignments: Dict[str, List[Parcel]], hub_unassigned: Set[str]) -> int:
+        """Write one hub's rows in one go. Returns how many rows."""
+        rows = list(hub_rows(hub_id, hub_assignments, hub_unassigned))  # Only this hub's rows at a time
+        if self.format == 'csv':
+            self.writer.writerows(rows)
+        else:
+            dumps = json.JSONEncoder(separators=(',', ':')).encode
+            self.file.write(''.join([dumps(dict(zip(EXPORT_HEADER, row))) + '\n' for row in rows]))
+        self.rows += len(rows)
+        return len(rows)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def export_assignments(path: str, hub_results: Iterable[Tuple[str, Dict[str, List[Parcel]], Set[str]]]) -> int:
+    """Write (hub_id, hub_assignments, hub_unassigned) results, e.g. from engine.iter_assignments. Returns rows written."""
+    with AssignmentWriter(path) as writer:
+        for hub_id, hub_assignments, hub_unassigned in hub_results:
+            writer.write_hub(hub_id, hub_assignments, hub_unassigned)
+    return writer.rows
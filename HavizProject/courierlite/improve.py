@@ -0,0 +1,221 @@
+from __future__ import annotations
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Tuple, Union
+from models import Parcel, Rider
+from store import ParcelStore
+if TYPE_CHECKING:
+    from engine import ParcelRepo, RiderRepo
+
+# Local search after assign_parcels: a parcel left unassigned often fits after all if another
+# parcel is moved to a different rider at the same hub, or two parcels swap riders. Nobody loses
+# a parcel they already have, so no EXPRESS parcel is ever dropped, waiting EXPRESS parcels are
+# tried before NORMAL ones, and each rider's list still starts with EXPRESS. Like re-packing the
+# boot of a car so the last suitcase fits.
+#
+# Every idea is checked with a few additions on the riders' running loads (no re-summing lists),
+# and the search stops when the time budget is used up, keeping whatever it has found so far.
+
+_CHECK_EVERY = 512  # Look at the clock once per this many tries, not every time
+_EPSILON = 1e-9  # "Strictly lighter than", for float weights
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class _Hub:
+    """One hub's riders, what each carries, and each one's running load."""
+    def __init__(self, hub_riders: List[Rider], hub_assignments: Dict[str, List[Parcel]], deadline: float):
+        self.riders = hub_riders
+        self.caps = [r.max_load_kg for r in hub_riders]
+        self.bins = [list(hub_assignments.get(r.rider_id, ())) for r in hub_riders]
+        self.loads = [sum(p.weight_kg for p in parcels) for parcels in self.bins]
+        self.deadline = deadline
+        self.tries = 0
+        self.reach = self._reach()
+
+    def _reach(self) -> float:
+        """Heaviest parcel one insert, move or swap could ever fit: the two biggest rooms added up.
+
+        A move or swap only shifts weight between two riders, so it can't free more than that.
+        """
+        rooms = sorted(cap - load for cap, load in zip(self.caps, self.loads))[-2:]
+        return sum(room for room in rooms if room > 0)
+
+    def _tick(self):
+        self.tries += 1
+        if self.tries % _CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise _OutOfTime
+
+    def place(self, parcel: Parcel) -> bool:
+        """Try to fit parcel: straight in, else after one move, else after one swap."""
+        if parcel.weight_kg > self.reach:
+            return False  # Can't work, no need to try anything
+        if self._insert(parcel) or self._move(parcel) or self._swap(parcel):
+            self.reach = self._reach()
+            return True
+        # Nothing changed, and anything heavier would fail every check this one failed
+        self.reach = min(self.reach, parcel.weight_kg - _EPSILON)
+        return False
+
+    def _insert(self, parcel: Parcel) -> bool:
+        w, caps, loads = parcel.weight_kg, self.caps, self.loads
+        best = None  # The rider it fits most snugly
+        for k in range(len(caps)):
+            self._tick()
+            if loads[k] + w <= caps[k] and (best is None or caps[k] - loads[k] < caps[best] - loads[best]):
+                best = k
+        if best is None:
+            return False
+        self._give(best, parcel)
+        return True
+
+    def _move(self, parcel: Parcel) -> bool:
+        """Move one parcel p from rider a to rider b, so the new parcel fits on a."""
+        w, caps, loads, bins = parcel.weight_kg, self.caps, self.loads, self.bins
+        n = len(caps)
+        for a in range(n):
+            for p in bins[a]:
+                wp = p.weight_kg
+                self._tick()
+                if loads[a] - wp + w > caps[a]:
+                    continue  # Moving p out of a doesn't make enough room
+                for b in range(n):
+                    self._tick()
+                    if b != a and loads[b] + wp <= caps[b]:
+                        self._take(a, p)
+                        self._give(b, p)
+                        self._give(a, parcel)
+                        return True
+        return False
+
+    def _swap(self, parcel: Parcel) -> bool:
+        """Swap a parcel p on rider a with a lighter q on rider b, so the new parcel fits on a."""
+        w, caps, loads, bins = parcel.weight_kg, self.caps, self.loads, self.bins
+        rooms = [cap - load for cap, load in zip(caps, loads)]
+        n = len(caps)
+        for a in range(n):
+            for b in range(n):
+                self._tick()
+                if b == a or rooms[a] + rooms[b] < w:
+                    continue  # A swap only shifts weight between a and b, together they don't have the room
+                for p in bins[a]:
+                    wp = p.weight_kg
+                    if wp + rooms[a] < w:
+                        continue  # Even with p gone entirely there's no room on a
+                    for q in bins[b]:
+                        wq = q.weight_kg
+                        self._tick()
+                        if wq - wp <= rooms[a] - w and wp - wq <= rooms[b]:
+                            self._take(a, p)
+                            self._take(b, q)
+                            self._give(b, p)
+                            self._give(a, q)
+                            self._give(a, parcel)
+                            return True
+        return False
+
+    def _give(self, k: int, parcel: Parcel):
+        self.bins[k].append(parcel)
+        self.loads[k] += parcel.weight_kg
+
+    def _take(self, k: int, parcel: Parcel):
+        self.bins[k].remove(parcel)
+        self.loads[k] -= parcel.weight_kg
+
+    def assignments(self) -> Dict[str, List[Parcel]]:
+        """{rider_id: parcels}, EXPRESS first in each list (otherwise in the order they were given)."""
+        return {rider.rider_id: sorted(parcels, key=_is_normal)
+                for rider, parcels in zip(self.riders, self.bins) if parcels}
+
+
+def _is_normal(p: Parcel) -> bool:
+    return p.priority != 'EXPRESS'
+
+
+def improve_hub(hub_riders: List[Rider], hub_assignments: Dict[str, List[Parcel]], waiting: Iterable[Parcel],
+                deadline: float) -> Tuple[Dict[str, List[Parcel]], Set[str]]:
+    """Local search for one hub until time.perf_counter() passes deadline.
+
+    Returns (hub_assignments, ids of the waiting parcels that now have a rider). The inputs are left
+    as they were. Waiting parcels are tried EXPRESS first, then NORMAL, lightest first within each.
+    """
+    if not hub_riders:
+        return hub_assignments, set()
+    hub = _Hub(hub_riders, hub_assignments, deadline)
+    # Riders are usually nearly full, so most waiting parcels are too heavy to bother sorting
+    waiting = sorted((p for p in waiting if p.weight_kg <= hub.reach), key=lambda p: (_is_normal(p), p.weight_kg))
+    placed = set()
+    try:
+        for parcel in waiting:
+            if hub.place(parcel):
+                placed.add(parcel.parcel_id)
+    except _OutOfTime:
+        pass  # Keep what was found; a half-done try never changed anything
+    if not placed:
+        return hub_assignments, placed
+    improved = {rider_id: [] for rider_id in hub_assignments}  # Riders listed before stay listed, even if emptied
+    improved.update(hub.assignments())
+    return improved, placed
+
+
+class HubImprover:
+    """improve_hub for hubs that come one at a time (e.g. from iter_assignments), sharing budget_ms between them.
+
+    Each hub gets a fair share of what's left, so time a hub doesn't use is passed on to the hubs after it.
+    Only the time spent inside improve() is taken off the budget: planning or writing hubs in between
+    doesn't use it up, so the same budget finds the same parcels whether hubs arrive all at once or one by one.
+    """
+    def __init__(self, riders: RiderRepo, budget_ms: float, hubs: int):
+        self.riders_by_hub = riders.grouped_by_hub()
+        self.budget = budget_ms / 1000  # Seconds left
+        self.left = max(hubs, 1)
+        self.recovered = 0
+
+    def out_of_time(self) -> bool:
+        return self.budget <= 0
+
+    def improve(self, hub_id: str, hub_assignments: Dict[str, List[Parcel]],
+                waiting: Iterable[Parcel]) -> Tuple[Dict[str, List[Parcel]], Set[str]]:
+        """improve_hub with this hub's share of the time: (hub_assignments, ids of the parcels placed).
+
+        Call it for every hub, even one with nothing waiting, so the shares come out the same either way.
+        """
+        share = self.budget / self.left
+        self.left = max(self.left - 1, 1)
+        if share <= 0 or hub_id not in self.riders_by_hub:
+            return hub_assignments, set()
+        waiting = list(waiting)  # Looking the parcels up isn't part of the search, so the clock starts after
+        if not waiting:
+            return hub_assignments, set()
+        start = time.perf_counter()
+        hub_assignments, placed = improve_hub(self.riders_by_hub[hub_id], hub_assignments, waiting, start + share)
+        self.budget -= time.perf_counter() - start
+        self.recovered += len(placed)
+        return hub_assignments, placed
+
+
+def improve_assignments(riders: RiderRepo, parcels: Union[ParcelRepo, ParcelStore], assignments: Dict[str, List[Parcel]],
+                        unassigned: Set[str], budget_ms: float) -> Tuple[Dict[str, List[Parcel]], Set[str], int]:
+    """Run improve_hub on every hub with riders, sharing budget_ms between them (see HubImprover).
+
+    Returns (assignments, unassigned, recovered). The inputs are left as they were.
+    """
+    improver = HubImprover(riders, budget_ms, len(riders.grouped_by_hub()))
+    if isinstance(parcels, ParcelStore):  # No index by hub: look each waiting parcel up once
+        grouped: Dict[str, List[Parcel]] = {}
+        for parcel in map(parcels.get, unassigned):
+            grouped.setdefault(parcel.hub_id, []).append(parcel)
+        waiting_at = lambda hub_id: grouped.get(hub_id, [])
+    else:  # The hub's own parcels, only for hubs the budget reaches
+        waiting_at = lambda hub_id: [p for p in parcels.by_hub(hub_id) if p.parcel_id in unassigned]
+    assignments, unassigned = dict(assignments), set(unassigned)
+    for hub_id, hub_riders in sorted(improver.riders_by_hub.items()):
+        if improver.out_of_time():
+            break
+        hub_assignments = {r.rider_id: assignments[r.rider_id] for r in hub_riders if r.rider_id in assignments}
+        hub_assignments, placed = improver.improve(hub_id, hub_assignments, waiting_at(hub_id))
+        if placed:
+            assignments.update(hub_assignments)
+            unassigned -= placed
+    return assignments, unassigned, improver.recovered
@@ -0,0 +1,216 @@
+import asyncio  # Lets one program wait on files, sockets and work at the same time
+import csv
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from engine import RiderRepo, _bias_resolver, check_parcel_row
+from models import Parcel, PickupPoint
+
+# Live mode: parcels trickle in all day, so assign each one as it arrives instead of
+# waiting for a complete ParcelRepo. Like a dispatcher at a counter rather than one big sort at night.
+
+
+class _HubState:
+    """Riders of one hub and how full each one is. Same round-robin rule as assign_parcels."""
+    __slots__ = ('riders', 'caps', 'loads', 'pos')
+
+    def __init__(self, riders: List):
+        self.riders = riders
+        self.caps = [r.max_load_kg for r in riders]
+        self.loads = [0.0] * len(riders)
+        self.pos = 0  # Whose turn it is
+
+
+class LiveAssigner:
+    """Assigns parcels against current rider loads, one micro-batch at a time.
+
+    Each parcel costs at most one look at each rider of its hub, no matter how many
+    parcels came before it. Pass earlier assignments to start from those loads.
+    A parcel ID sent again replaces the earlier copy (the last row wins, as in load_parcels):
+    the old copy is taken off its rider, or out of unassigned, before the new one is assigned.
+    """
+    def __init__(self, riders: RiderRepo, pickups: Dict[str, PickupPoint],
+                 assignments: Optional[Dict[str, List[Parcel]]] = None):
+        self.hubs: Dict[str, _HubState] = {hub_id: _HubState(group) for hub_id, group in riders.grouped_by_hub().items()}
+        self.bias_of = _bias_resolver(pickups)
+        self.assignments: Dict[str, List[Parcel]] = {}
+        self.unassigned = set()
+        self.placed: Dict[str, Tuple[Optional[_HubState], Optional[int], Parcel]] = {}  # parcel_id -> (hub, rider position, parcel)
+        for hub in self.hubs.values():
+            for k, rider in enumerate(hub.riders):
+                for parcel in (assignments or {}).get(rider.rider_id, []):
+                    hub.loads[k] += parcel.weight_kg
+                    self.assignments.setdefault(rider.rider_id, []).append(parcel)
+                    self.placed[parcel.parcel_id] = (hub, k, parcel)
+
+    def _take_back(self, parcel_id: str):
+        """Undo an earlier copy of parcel_id, if there is one."""
+        entry = self.placed.pop(parcel_id, None)
+        if entry is None:
+            return  # First time we see it
+        hub, k, old = entry
+        if hub is None:
+            return  # It was at a hub with no riders: nothing to undo
+        if k is None:
+            self.unassigned.discard(parcel_id)
+            return
+        rider_parcels = self.assignments[hub.riders[k].rider_id]
+        del rider_parcels[next(i for i, p in enumerate(rider_parcels) if p is old)]
+        hub.loads[k] = sum(p.weight_kg for p in rider_parcels)  # Re-summed, so no rounding is left behind
+
+    def assign(self, parcel: Parcel) -> Optional[str]:
+        """Give one parcel to the next rider (in turn) with room. Returns the rider ID or None."""
+        self._take_back(parcel.parcel_id)
+        hub = self.hubs.get(parcel.hub_id)
+        if hub is None:
+            self.placed[parcel.parcel_id] = (None, None, parcel)
+            return None  # No riders at that hub, same as assign_parcels
+        weight, caps, loads, n = parcel.weight_kg, hub.caps, hub.loads, len(hub.caps)
+        for step in range(n):
+            k = (hub.pos + step) % n
+            if loads[k] + weight <= caps[k]:
+                loads[k] += weight
+                hub.pos = (k + 1) % n
+                rider_id = hub.riders[k].rider_id
+                self.assignments.setdefault(rider_id, []).append(parcel)
+                self.placed[parcel.parcel_id] = (hub, k, parcel)
+                return rider_id
+        hub.pos = (hub.pos + 1) % n
+        self.unassigned.add(parcel.parcel_id)
+        self.placed[parcel.parcel_id] = (hub, None, parcel)
+        return None
+
+    def assign_batch(self, parcels: List[Parcel]) -> List[Tuple[Parcel, Optional[str]]]:
+        """Assign a micro-batch: EXPRESS first, then higher pickup bias, then parcel ID.
+
+        An ID that comes twice in one batch is assigned once, from its last copy.
+        """
+        bias_of = self.bias_of
+        latest = list({p.parcel_id: p for p in parcels}.values())
+        ordered = sorted(latest, key=lambda p: (p.priority != 'EXPRESS', -bias_of(p.pickup_id), p.parcel_id))
+        return [(p, self.assign(p)) for p in ordered]
+
+
+class LiveStats:
+    """Counters and recent per-event latencies (arrival to assignment)."""
+    def __init__(self, window: int = 10000):
+        self.events = 0
+        self.batches = 0
+        self.bad_lines = 0
+        self.max_depth = 0
+        self.latencies = deque(maxlen=window)  # Only the most recent ones, so memory stays flat
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self) -> str:
+        return (f"{self.events} parcels in {self.batches} batches, {self.bad_lines} bad lines, "
+                f"max queue {self.max_depth}, latency p50 {self.percentile(50) * 1000:.2f} ms "
+                f"p99 {self.percentile(99) * 1000:.2f} ms")
+
+
+class LivePipeline:
+    """Bounded queue between readers and the assigner.
+
+    When the queue is full, put() waits, so readers stop reading until the assigner catches up
+    (backpressure). The assigner takes whatever is waiting, up to max_batch, as one micro-batch.
+    """
+    def __init__(self, assigner: LiveAssigner, max_queue: int = 1000, max_batch: int = 256,
+                 on_result: Optional[Callable[[Parcel, Optional[str]], None]] = None):
+        self.assigner = assigner
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.max_batch = max_batch
+        self.on_result = on_result
+        self.stats = LiveStats()
+
+    async def put(self, parcel: Parcel):
+        await self.queue.put((parcel, time.perf_counter()))
+        self.stats.max_depth = max(self.stats.max_depth, self.queue.qsize())
+
+    async def put_line(self, line: str):
+        """Parse one CSV line and queue it. Header lines and bad rows are skipped."""
+        line = line.strip()
+        if not line or line.lower().startswith('parcel_id,'):
+            return
+        checked = check_parcel_row(next(csv.reader([line])))
+        if checked is None:
+            self.stats.bad_lines += 1
+            return
+        await self.put(Parcel(*checked))
+
+    async def run_assigner(self):
+        """Assign micro-batches forever (cancel the task to stop)."""
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            arrived = {id(parcel): t for parcel, t in batch}
+            results = self.assigner.assign_batch([parcel for parcel, _ in batch])
+            now = time.perf_counter()
+            for parcel, rider_id in results:
+                self.stats.latencies.append(now - arrived[id(parcel)])
+                if self.on_result is not None:
+                    self.on_result(parcel, rider_id)
+            self.stats.events += len(batch)
+            self.stats.batches += 1
+            for _ in batch:
+                self.queue.task_done()
+            await asyncio.sleep(0)  # Let the readers run between batches
+
+
+async def tail_file(path: str, pipeline: LivePipeline, poll_interval: float = 0.2, from_start: bool = True):
+    """Follow a growing CSV file, like `tail -f`, feeding each complete line to the pipeline."""
+    with open(path, 'r', newline='') as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        partial = ''
+        while True:
+            chunk = f.readline()
+            if not chunk:
+                if os.path.getsize(path) < f.tell():
+                    f.seek(0)  # File was truncated or replaced: start over
+                    partial = ''
+                await asyncio.sleep(poll_interval)
+                continue
+            partial += chunk
+            if partial.endswith('\n'):  # Only whole lines; the writer may be mid-line
+                await pipeline.put_line(partial)
+                partial = ''
+
+
+async def serve_socket(path: str, pipeline: LivePipeline) -> asyncio.AbstractServer:
+    """Accept CSV lines from any number of local clients on a Unix socket."""
+    if os.path.exists(path):
+        os.unlink(path)
+
+    async def client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            async for raw in reader:  # Not reading while put() waits is what pushes back on the client
+                await pipeline.put_line(raw.decode('utf-8'))
+        finally:
+            writer.close()
+
+    return await asyncio.start_unix_server(client, path=path)
+
+
+async def run_live(pipeline: LivePipeline, tail_path: Optional[str] = None, socket_path: Optional[str] = None,
+                   poll_interval: float = 0.2):
+    """Run the assigner plus the chosen sources until cancelled."""
+    tasks = [asyncio.create_task(pipeline.run_assigner())]
+    server = None
+    if tail_path:
+        tasks.append(asyncio.create_task(tail_file(tail_path, pipeline, poll_interval)))
+    if socket_path:
+        server = await serve_socket(socket_path, pipeline)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        if server is not None:
+            server.close()
+            await server.wait_closed()
@@ -0,0 +1,98 @@
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Logging for dirty input files. Instead of one warning per bad row (a million bad rows = a million
+# log lines), loaders count bad rows per kind, keep a few examples, and log one summary at the end.
+# setup_logging() puts a queue in front of the real handlers, so a slow disk never holds up parsing.
+# Like a teacher tallying mistakes on the board and reading out the totals, not stopping for each one.
+
+
+class RowErrors:
+    """Bad-row counts per category plus the first few example rows of each."""
+    def __init__(self, source: str, samples: int = 3):
+        self.source = source
+        self.samples = samples
+        self.counts: Dict[str, int] = {}
+        self.examples: Dict[str, List[Tuple[int, List[str]]]] = {}
+
+    def add(self, category: str, line_no: int, row: List[str]):
+        count = self.counts.get(category, 0)
+        self.counts[category] = count + 1
+        if count < self.samples:  # Only keep a few, memory stays small however bad the file is
+            self.examples.setdefault(category, []).append((line_no, row))
+
+    def merge(self, counts: Dict[str, int], examples: Dict[str, List[Tuple[int, List[str]]]], line_offset: int = 0):
+        """Add counts and examples from another RowErrors (e.g. a worker's), shifting its line numbers."""
+        for category, count in counts.items():
+            kept = self.examples.setdefault(category, [])
+            room = self.samples - len(kept)
+            kept += [(line_no + line_offset, row) for line_no, row in examples.get(category, [])[:max(room, 0)]]
+            self.counts[category] = self.counts.get(category, 0) + count
+
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def report(self, logger: logging.Logger):
+        """One warning for the whole file (nothing if it was clean)."""
+        if not self.counts:
+            return
+        parts = ', '.join(f'{category}: {count}' for category, count in sorted(self.counts.items()))
+        examples = '; '.join(f'line {line_no} {category} {row}'
+                             for category, rows in sorted(self.examples.items()) for line_no, row in rows)
+        logger.warning("%s: skipped %d bad rows (%s). Examples: %s", self.source, self.total(), parts, examples)
+
+
+_listener = None  # The QueueListener thread, once setup_logging() has run
+
+
+def setup_logging(config_path: Optional[str] = None, level: int = logging.WARNING):
+    """Send log records through a queue to the real handlers, which run on a background thread.
+
+    With config_path (e.g. courierlite/logging.conf) those handlers come from the file;
+    otherwise warnings go to stderr as before. Safe to call more than once.
+    """
+    global _listener
+    import atexit
+    import logging.handlers
+    import queue
+    if _listener is not None:
+        return _listener
+    root = logging.getLogger()
+    if config_path:
+        import logging.config
+        _make_log_dirs(config_path)
+        logging.config.fileConfig(config_path, disable_existing_loggers=False)
+        handlers = list(root.handlers)
+    else:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+        handlers = [handler]
+        root.setLevel(level)
+    records = queue.SimpleQueue()  # No size limit, so logging never blocks the caller
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)  # Write out whatever is still queued before exit
+    return _listener
+
+
+def stop_logging():
+    """Flush the queue and stop the background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _make_log_dirs(config_path: str):
+    """FileHandlers in the config can't create their folder (logs/), so make it first."""
+    import configparser
+    import ast
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(config_path)
+    for section in parser.sections():
+        if section.startswith('handler_') and 'FileHandler' in parser[section].get('class', ''):
+            args = ast.literal_eval(parser[section].get('args', '()'))
+            if args and os.path.dirname(str(args[0])):
+                os.makedirs(os.path.dirname(str(args[0])), exist_ok=True)
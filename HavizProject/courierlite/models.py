@@ -1,19 +1,31 @@
-from typing import Tuple  # This helps Python know what types of things we're using, like lists or numbers.
+from __future__ import annotations
+from typing import Optional, Tuple  # This helps Python know what types of things we're using, like lists or numbers.
+
+PICKUP_PREFIX = 'PICKUP:'  # Destinations like "PICKUP:K1" mean "leave it at pickup point K1"
+
+def parse_pickup(destination: str) -> Optional[str]:
+    """Pickup ID from a destination like 'PICKUP:K1', or None for a plain destination like 'Sabiiti'."""
+    if PICKUP_PREFIX in destination:
+        return destination.split(PICKUP_PREFIX)[1]
+    return None
 
 # This is a "mixin" – think of it as a superpower that classes can borrow.
 class Identifiable:
     """Mixin for objects with an ID. Like giving everything a name tag."""
+    __slots__ = ()  # Empty slots so classes using this mixin can stay slotted too
     def get_id(self) -> str:
         raise NotImplementedError  # Means "you must fill this in when you use it!"
 
 class Printable:
     """Mixin for objects that can be printed as a row. Like turning info into a table row."""
+    __slots__ = ()
     def to_row(self) -> Tuple:
         raise NotImplementedError
 
 # A Hub is like a store or library where deliveries start.
 class Hub(Identifiable, Printable):
     """Represents a hub on campus. Like Haviz Cafe or a hostel."""
+    __slots__ = ('hub_id', 'hub_name', 'campus')  # Fixed fields, no per-object dict – much less memory
     def __init__(self, hub_id: str, hub_name: str, campus: str):
         self.hub_id = hub_id  # Unique name, like "H1"
         self.hub_name = hub_name  # Friendly name, like "Haviz Cafe"
@@ -31,6 +43,7 @@ class Hub(Identifiable, Printable):
 # A Parcel is like a package: coffee, jeans, or a book.
 class Parcel(Identifiable, Printable):
     """Represents a parcel to be delivered. Like a box of pastries."""
+    __slots__ = ('parcel_id', 'recipient', 'priority', 'hub_id', 'destination', 'weight_kg', 'pickup_id')
     def __init__(self, parcel_id: str, recipient: str, priority: str, hub_id: str, destination: str, weight_kg: float):
         self.parcel_id = parcel_id  # Unique ID, like "P1"
         self.recipient = recipient  # Who gets it, like "Student A"
@@ -38,6 +51,7 @@ class Parcel(Identifiable, Printable):
         self.hub_id = hub_id  # Where it starts, like from Haviz Cafe
         self.destination = destination  # Where it goes, like "Sabiiti" hostel
         self.weight_kg = weight_kg  # How heavy, in kg
+        self.pickup_id = parse_pickup(destination)  # Worked out once here, not every time we sort
 
     def get_id(self) -> str:
         return self.parcel_id
@@ -51,6 +65,7 @@ class Parcel(Identifiable, Printable):
 # A Rider is like a delivery guy: Sunday from JLuxe or Cole from the library.
 class Rider(Identifiable, Printable):
     """Represents a delivery rider. Like the guy on a boda or walking."""
+    __slots__ = ('rider_id', 'name', 'max_load_kg', 'home_hub_id')
     def __init__(self, rider_id: str, name: str, max_load_kg: float, home_hub_id: str):
         self.rider_id = rider_id  # Unique ID, like "R1"
         self.name = name  # Name, like "Sunday"
@@ -69,6 +84,7 @@ class Rider(Identifiable, Printable):
 # Personalization: Special pickup spots, like kiosks or lockers at hostels.
 class PickupPoint(Identifiable, Printable):
     """Base class for pickup points. Like a locker where you grab stuff."""
+    __slots__ = ('pickup_id', 'hub_id', 'label', 'base_priority_bias')
     def __init__(self, pickup_id: str, hub_id: str, label: str, base_priority_bias: int = 0):
         self.pickup_id = pickup_id  # Unique ID
         self.hub_id = hub_id  # Linked to a hub
@@ -87,15 +103,18 @@ class PickupPoint(Identifiable, Printable):
 # Subclasses: Different types of pickups with their own biases.
 class CampusKiosk(PickupPoint):
     """Pickup at campus kiosks, slight priority boost. Like a quick-stop spot."""
+    __slots__ = ()  # Subclasses need empty slots too, or they get a dict back
     def __init__(self, pickup_id: str, hub_id: str, label: str):
         super().__init__(pickup_id, hub_id, label, base_priority_bias=1)  # +1 means a bit faster
 
 class DormLocker(PickupPoint):
     """Pickup at dorm lockers, neutral bias. Normal speed."""
+    __slots__ = ()
     def __init__(self, pickup_id: str, hub_id: str, label: str):
         super().__init__(pickup_id, hub_id, label, base_priority_bias=0)  # No bonus
 
 class OfficeDesk(PickupPoint):
     """Pickup at office desks, slight priority reduction. A bit slower."""
+    __slots__ = ()
     def __init__(self, pickup_id: str, hub_id: str, label: str):
         super().__init__(pickup_id, hub_id, label, base_priority_bias=-1)  # -1 means slower
\ No newline at end of file
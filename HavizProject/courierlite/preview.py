@@ -0,0 +1,145 @@
+from __future__ import annotations
+from bisect import bisect_right  # Find which weight band a parcel falls in
+from itertools import islice, repeat
+from operator import add, attrgetter, mul
+from typing import Callable, Dict, Iterable, Iterator, List, TextIO
+from models import Parcel, PickupPoint
+
+# Preview pipeline: put a rider's parcels in delivery order using several rules at once.
+# Chaining generators (heavy_first(...)(express_then_normal(...))) copies everything into lists
+# once per rule. Here every rule just gives each parcel a bucket number, the numbers are combined,
+# and one pass drops each parcel into its final bucket. Like sorting mail straight into pigeonholes.
+
+
+class Stage:
+    """One ordering rule: key(parcel) gives a bucket from 0 to buckets-1, and bucket 0 goes first."""
+    __slots__ = ('name', 'key', 'buckets')
+
+    def __init__(self, name: str, key: Callable[[Parcel], int], buckets: int):
+        self.name = name
+        self.key = key
+        self.buckets = buckets
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, buckets={self.buckets})"
+
+
+def by_priority() -> Stage:
+    """EXPRESS first, then everything else."""
+    return Stage('priority', lambda p: p.priority != 'EXPRESS', 2)
+
+
+def by_weight(threshold_kg: float) -> Stage:
+    """Heavy parcels (>= threshold) first, then light ones."""
+    return Stage(f'weight>={threshold_kg}', lambda p: p.weight_kg < threshold_kg, 2)
+
+
+def by_weight_bands(thresholds_kg: Iterable[float]) -> Stage:
+    """Heaviest band first. Thresholds [10, 5, 2] give bands >=10, 5-10, 2-5 and <2 kg."""
+    ascending = sorted(set(thresholds_kg))
+    top = len(ascending)
+    return Stage(f'bands{ascending}', lambda p: top - bisect_right(ascending, p.weight_kg), top + 1)
+
+
+def by_pickup_bias(pickups: Dict[str, PickupPoint]) -> Stage:
+    """Higher pickup bias first. Parcels without a (known) pickup count as bias 0."""
+    biases = sorted({pickup.base_priority_bias for pickup in pickups.values()} | {0}, reverse=True)
+    rank = {bias: i for i, bias in enumerate(biases)}
+    rank_of_pickup = {pickup_id: rank[pickup.base_priority_bias] for pickup_id, pickup in pickups.items()}
+    default = rank[0]
+    return Stage('pickup_bias', lambda p: rank_of_pickup.get(p.pickup_id, default), len(biases))
+
+
+def _fuse(outer: Callable[[Parcel], int], stage: Stage) -> Callable[[Parcel], int]:
+    """Key for 'outer, then stage as tie-breaker': a mixed-radix number, like hours*60 + minutes."""
+    inner, radix = stage.key, stage.buckets
+    return lambda p: outer(p) * radix + inner(p)
+
+
+class PreviewPipeline:
+    """Several stages fused into one stable pass. Stages are listed most important first.
+
+    PreviewPipeline(by_weight(2.0), by_priority()) gives the same order as
+    heavy_first(2.0)(express_then_normal(parcels)), with one buffer instead of two.
+    Parcels that land in the very first bucket are yielded as soon as they're read.
+    """
+    def __init__(self, *stages: Stage):
+        self.stages = stages
+        self.size = 1
+        self.key = None  # All stage keys combined into one bucket number
+        for stage in stages:
+            self.size *= stage.buckets
+            self.key = stage.key if self.key is None else _fuse(self.key, stage)
+
+    def then(self, stage: Stage) -> PreviewPipeline:
+        """A new pipeline with one more tie-breaking stage at the end."""
+        return PreviewPipeline(*self.stages, stage)
+
+    def keys(self, parcels: List[Parcel]) -> Iterator[int]:
+        """Bucket numbers for a whole list: one map() per stage, no combining call per parcel."""
+        if not self.stages:
+            return repeat(0, len(parcels))
+        keys = map(self.stages[0].key, parcels)
+        for stage in self.stages[1:]:
+            keys = map(add, map(mul, keys, repeat(stage.buckets)), map(stage.key, parcels))
+        return keys
+
+    def __call__(self, parcels: Iterable[Parcel]) -> Iterator[Parcel]:
+        key = self.key
+        if key is None:
+            yield from parcels
+            return
+        later: List[List[Parcel]] = [[] for _ in range(self.size)]
+        for p in parcels:
+            bucket = key(p)
+            if bucket:
+                later[bucket].append(p)
+            else:
+                yield p  # Nothing can come before it, so don't wait
+        for bucket in later:
+            yield from bucket
+
+    def __repr__(self):
+        return f"PreviewPipeline{self.stages!r}"
+
+
+_parcel_id = attrgetter('parcel_id')
+_weight_kg = attrgetter('weight_kg')
+
+
+def write_previews(out: TextIO, assignments: Dict[str, List[Parcel]], rider_ids: Iterable[str],
+                   pipeline: PreviewPipeline, lines_per_write: int = 65536) -> int:
+    """Write the preview of every rider in rider_ids to out. Returns how many parcel lines were written.
+
+    Same text as printing each rider's pipeline, but all riders are ordered by one sort of
+    (rider, bucket) numbers and the lines go out in big joined blocks instead of one print each.
+    """
+    rider_ids = list(rider_ids)
+    parcels: List[Parcel] = []
+    riders: List[int] = []  # Rider number of each parcel, times the pipeline's bucket count
+    counts: List[int] = []
+    for r, rider_id in enumerate(rider_ids):
+        rider_parcels = assignments.get(rider_id, ())
+        parcels += rider_parcels
+        riders += repeat(r * pipeline.size, len(rider_parcels))
+        counts.append(len(rider_parcels))
+    sort_keys = list(map(add, riders, pipeline.keys(parcels)))  # Rider first, then bucket
+    order = sorted(range(len(parcels)), key=sort_keys.__getitem__)  # Stable, so ties keep their order
+    ordered = [parcels[i] for i in order]
+    weights = list(map(_weight_kg, ordered))
+    weight_text = {w: str(w) for w in set(weights)}  # Few distinct weights, so format each once
+    lines = map(''.join, zip(repeat('  '), map(_parcel_id, ordered), repeat(' ('),
+                             map(weight_text.__getitem__, weights), repeat('kg)\n')))
+
+    block: List[str] = []
+    pending = 0
+    for rider_id, count in zip(rider_ids, counts):
+        block.append(f"Preview for {rider_id}:\n")
+        block.extend(islice(lines, count))
+        pending += count + 1
+        if pending >= lines_per_write:
+            out.write(''.join(block))
+            block, pending = [], 0
+    out.write(''.join(block))
+    return len(ordered)
+
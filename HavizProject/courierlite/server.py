@@ -0,0 +1,199 @@
+import json  # Answers go back as one JSON line each
+import os
+import socket
+import socketserver  # Ready-made socket servers; one thread per client
+import threading
+from functools import cached_property  # Work something out once, on first use
+from typing import Dict, List, Optional, Set, Tuple
+
+# Daemon mode: load the data once and keep it in memory, like a shop that stays open
+# instead of unpacking everything for each customer.
+#
+# Protocol (one request per line, one JSON answer per line, connections can be reused):
+#   ASSIGN            -> {"ok": true, "riders": {rider_id: [load_kg, count]}, "unassigned": [...]}
+#   PREVIEW <rider>   -> {"ok": true, "rider": ..., "parcels": [[parcel_id, weight_kg], ...]}
+#   WHERE <parcel>    -> {"ok": true, "parcel": ..., "rider": rider_id or null}
+#   RELOAD            -> {"ok": true, "parcels": count, "appended": new parcels, or null after a full reload}
+#   PING              -> {"ok": true}
+# Errors come back as {"ok": false, "error": "..."}.
+# The engine is imported where it's used, so `cli.py query` (client only) starts quickly.
+
+
+def _encode(answer: dict) -> bytes:
+    return json.dumps(answer, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class DispatchView:
+    """One loaded copy of the data plus its assignment. Never changed after it's built;
+    RELOAD makes a new view (with its own parcel repo) and swaps it in.
+    """
+    def __init__(self, hubs, parcels, riders, pickups, strategy: str, threshold: float,
+                 result: Optional[Tuple[Dict, Set[str]]] = None):
+        from engine import assign_parcels
+        self.hubs, self.parcels, self.riders, self.pickups = hubs, parcels, riders, pickups
+        self.threshold = threshold
+        if result is None:  # Not worked out already by a RELOAD
+            result = assign_parcels(hubs, riders, parcels, pickups, strategy=strategy)
+        self.assignments, self.unassigned = result
+        self.rider_of: Dict[str, str] = {p.parcel_id: rider_id
+                                         for rider_id, rider_parcels in self.assignments.items() for p in rider_parcels}
+        self.summary = {rider_id: [round(sum(p.weight_kg for p in rider_parcels), 3), len(rider_parcels)]
+                        for rider_id, rider_parcels in sorted(self.assignments.items())}
+
+    @cached_property
+    def assign_reply(self) -> bytes:
+        """The ASSIGN answer, encoded once per view (the data can't change under it)."""
+        return _encode({'ok': True, 'riders': self.summary, 'unassigned': sorted(self.unassigned)})
+
+    def preview(self, rider_id: str) -> List[List]:
+        from preview import PreviewPipeline, by_priority, by_weight
+        pipeline = PreviewPipeline(by_weight(self.threshold), by_priority())  # Heavy first, EXPRESS first within each
+        return [[p.parcel_id, p.weight_kg] for p in pipeline(self.assignments.get(rider_id, []))]
+
+
+class DispatchState:
+    """Holds the current view. RELOAD builds a new view and swaps it in, so readers never wait."""
+    def __init__(self, hubs_path: str, parcels_path: str, riders_path: str, pickups_path: Optional[str] = None,
+                 strategy: str = 'round_robin', threshold: float = 2.0):
+        self.paths = (hubs_path, parcels_path, riders_path, pickups_path)
+        self.strategy = strategy
+        self.threshold = threshold
+        self._reload_lock = threading.Lock()  # One reload at a time
+        self.view = self._build()
+
+    def _build(self) -> DispatchView:
+        from engine import load_hubs, load_parcels, load_riders, load_pickups
+        hubs_path, parcels_path, riders_path, pickups_path = self.paths
+        stamps = self._stamps()  # Before reading: a change made meanwhile is seen next time
+        hubs = load_hubs(hubs_path)
+        parcels = load_parcels(parcels_path)
+        riders = load_riders(riders_path)
+        pickups = load_pickups(pickups_path, hubs)
+        view = DispatchView(hubs, parcels, riders, pickups, self.strategy, self.threshold)
+        self.stamps = stamps  # Only once the new view is ready
+        return view
+
+    def _stamps(self) -> List:
+        """(size, mtime) of the hubs, riders and pickups files: if any changed, RELOAD starts from scratch."""
+        hubs_path, _, riders_path, pickups_path = self.paths
+        stamps = []
+        for path in (hubs_path, riders_path, pickups_path):
+            st = os.stat(path) if path and os.path.exists(path) else None
+            stamps.append(st and (st.st_size, st.st_mtime_ns))
+        return stamps
+
+    def _append(self, view: DispatchView) -> Optional[Tuple[DispatchView, int]]:
+        """(view with the parcels appended since view was made, how many), or None if a full reload is needed.
+
+        Only hubs that got new parcels are planned again, so the answer is the same as a full reload.
+        """
+        from engine import RiderRepo, assign_parcels, load_appended
+        if self._stamps() != self.stamps:
+            return None
+        appended = load_appended(view.parcels)  # A new repo: the live view's parcels and marks stay as they are
+        if appended is None:
+            return None  # The parcels file was truncated or rewritten
+        parcels, added, hub_ids = appended
+        if not added:
+            if parcels is view.parcels:
+                return view, 0
+            # Only bad rows were appended: same answer, but remember they've been read
+            return DispatchView(view.hubs, parcels, view.riders, view.pickups, self.strategy, self.threshold,
+                                (view.assignments, view.unassigned)), 0
+        touched = RiderRepo()
+        for rider in view.riders.all():
+            if rider.home_hub_id in hub_ids:
+                touched.add(rider)
+        hub_assignments, hub_unassigned = assign_parcels(view.hubs, touched, parcels, view.pickups, strategy=self.strategy)
+        assignments = {rider_id: rider_parcels for rider_id, rider_parcels in view.assignments.items()
+                       if view.riders.get(rider_id).home_hub_id not in hub_ids}
+        assignments.update(hub_assignments)
+        unassigned = {parcel_id for parcel_id in view.unassigned
+                      if view.parcels.get(parcel_id).hub_id not in hub_ids} | hub_unassigned
+        # If planning above fails, nothing has changed: the rows are read again on the next RELOAD
+        return DispatchView(view.hubs, parcels, view.riders, view.pickups, self.strategy, self.threshold,
+                            (assignments, unassigned)), len(added)
+
+    def reload(self) -> Tuple[DispatchView, Optional[int]]:
+        """Read what was appended to the parcels file; everything again if it was rewritten or other files changed.
+
+        Returns the new view and how many parcels were appended (None after a full reload).
+        """
+        with self._reload_lock:
+            view, appended = self._append(self.view) or (self._build(), None)
+            self.view = view  # A single assignment, so the swap is atomic
+        return view, appended
+
+    def handle(self, line: str):
+        """Answer one request line: a dict, or bytes that are already encoded."""
+        op, _, arg = line.strip().partition(' ')
+        op = op.upper()
+        view = self.view  # Grab once, so one request sees one consistent view
+        if op == 'ASSIGN':
+            return view.assign_reply
+        if op == 'PREVIEW' and arg:
+            return {'ok': True, 'rider': arg, 'parcels': view.preview(arg)}
+        if op == 'WHERE' and arg:
+            if not view.parcels.exists(arg):
+                return {'ok': False, 'error': f"Unknown parcel {arg}"}
+            return {'ok': True, 'parcel': arg, 'rider': view.rider_of.get(arg)}
+        if op == 'RELOAD':
+            view, appended = self.reload()
+            return {'ok': True, 'parcels': len(view.parcels.ids()), 'appended': appended}
+        if op == 'PING':
+            return {'ok': True}
+        return {'ok': False, 'error': f"Bad request: {line.strip()!r}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:  # Keep answering until the client hangs up
+            try:
+                answer = self.server.state.handle(raw.decode('utf-8'))
+            except Exception as e:
+                answer = {'ok': False, 'error': str(e)}
+            self.wfile.write(answer if isinstance(answer, bytes) else _encode(answer))
+            self.wfile.flush()
+
+
+class DispatchServer(socketserver.ThreadingUnixStreamServer):
+    """Unix-socket server, one thread per connected client."""
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, state: DispatchState):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # Left over from an earlier run
+        self.state = state
+        super().__init__(socket_path, _Handler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def serve(socket_path: str, state: DispatchState):
+    """Answer requests until interrupted."""
+    with DispatchServer(socket_path, state) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+class DispatchClient:
+    """Keeps one connection open and sends requests over it."""
+    def __init__(self, socket_path: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.reader = self.sock.makefile('rb')
+
+    def request(self, line: str) -> dict:
+        self.sock.sendall(line.encode('utf-8') + b'\n')
+        return json.loads(self.reader.readline())
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
@@ -0,0 +1,311 @@
+import csv
+import gc
+import glob
+import io
+import logging
+import mmap
+import os
+import zlib  # crc32: a quick fingerprint of the part of a file already read
+from array import array
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+from logsetup import RowErrors
+
+# Reading big inputs: a glob of shard files (parcels-000.csv ... parcels-255.csv) and/or one huge
+# file cut into pieces at line ends. With jobs > 1 the pieces are parsed by a process pool and the
+# rows come back in file order, so the result is the same as reading everything in one go.
+# Like splitting a stack of exam papers between several markers and then putting the pile back in order.
+#
+# Files without quotes skip the csv module: the file is memory-mapped, a block of whole lines is
+# split in one go, and the number columns are converted straight from that split. csv.reader
+# (one list per row) is only used for blocks that need it, and for files that contain quotes.
+
+logger = logging.getLogger(__name__)
+
+Check = Callable[[List[str], Optional[RowErrors], int], Optional[tuple]]  # e.g. engine.check_parcel_row
+
+SEPARATOR = '\x1f'  # ASCII "unit separator": joins a text column into one string for the trip back
+
+
+BLOCK_BYTES = 1 << 16  # Scan size: small enough to stay in the CPU cache (16-64 KB measured fastest)
+
+
+class Layout(NamedTuple):
+    """What a clean row looks like: how many columns, and which of them are numbers (floats)."""
+    width: int
+    numbers: Tuple[int, ...]
+
+
+class FileMark(NamedTuple):
+    """How much of a file has been read: up to offset (just after a line end), with a crc32 and line count of that part."""
+    offset: int
+    crc: int
+    lines: int
+
+
+def is_pattern(path: str) -> bool:
+    """True for a glob like data/parcels-*.csv, False for a plain file name."""
+    return any(c in path for c in '*?[')
+
+
+def expand_paths(pattern: str) -> List[str]:
+    """Files matching pattern, sorted by name. A plain path (no * ? [) is returned as is."""
+    if not is_pattern(pattern):
+        return [pattern]
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"No files match {pattern}")
+    return paths
+
+
+def split_ranges(path: str, parts: int, min_bytes: int = 4 << 20) -> List[Tuple[int, int]]:
+    """Cut the rows of a file (everything after the header) into about `parts` byte ranges.
+
+    Every range starts right after a newline and ends right after one, so no row is cut in half.
+    Files smaller than min_bytes per part get fewer ranges. Rows must not contain line breaks
+    inside quoted fields (our exports never do).
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()  # The header
+        start = f.tell()
+        parts = max(1, min(parts, (size - start) // min_bytes))
+        cuts = [start]
+        for k in range(1, parts):
+            f.seek(start + (size - start) * k // parts)
+            f.readline()  # Move on to the start of the next row
+            if f.tell() > cuts[-1] and f.tell() < size:
+                cuts.append(f.tell())
+    cuts.append(size)
+    return list(zip(cuts, cuts[1:]))
+
+
+def read_rows(path: str, check: Check) -> Iterator[tuple]:
+    """Checked rows of one file through csv.reader, one summary warning for the bad ones."""
+    errors = RowErrors(path)
+    try:
+        with open(path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Skip the header row
+            for row in reader:
+                checked = check(row, errors, reader.line_num)
+                if checked is not None:
+                    yield checked
+    finally:
+        errors.report(logger)  # Also when the reader stops early
+
+
+def scan_rows(path: str, check: Check, layout: Layout, block_bytes: int = BLOCK_BYTES) -> Iterator[tuple]:
+    """Same rows as read_rows, found by splitting memory-mapped blocks of whole lines at once.
+
+    Blocks with a bad row go through csv.reader (so the warnings stay the same), and a file
+    with any quote in it is left to read_rows entirely.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None  # Can't map an empty file
+    if mm is None or mm.find(b'"') != -1:  # Quotes can hide commas and line breaks: only csv gets those right
+        if mm is not None:
+            mm.close()
+        yield from read_rows(path, check)
+        return
+    errors = RowErrors(path)
+    try:
+        start = mm.find(b'\n') + 1 or size  # Skip the header row
+        yield from _block_rows(mm, start, size, check, layout, errors, 1, block_bytes)
+    finally:
+        mm.close()
+        errors.report(logger)
+
+
+def _block_rows(buf, start: int, end: int, check: Check, layout: Layout, errors: RowErrors,
+                line: int, block_bytes: int = BLOCK_BYTES) -> Iterator[tuple]:
+    """Checked rows between two line-aligned offsets of buf (an mmap or bytes), one block at a time.
+
+    line is how many lines of the file come before start.
+    """
+    while start < end:
+        stop = buf.find(b'\n', min(start + block_bytes, end) - 1, end) + 1 or end  # Stop after a whole line
+        text = buf[start:stop].decode()
+        columns = scan_columns(text, layout)
+        if columns is not None:
+            yield from zip(*columns)
+        else:
+            yield from _csv_rows(text, check, errors, line)
+        line += text.count('\n')
+        start = stop
+
+
+def scan_columns(text: str, layout: Layout) -> Optional[List[list]]:
+    """Columns of a block of whole lines, or None if some row needs csv.reader after all.
+
+    One split for the block, with line ends kept as their own field: a clean row is
+    width fields plus '\n', so each column is a slice. Number columns become floats here.
+    """
+    if '\r' in text:
+        text = text.replace('\r\n', '\n')
+        if '\r' in text:
+            return None
+    if '"' in text:
+        return None
+    if text and not text.endswith('\n'):
+        text += '\n'
+    rows = text.count('\n')
+    step = layout.width + 1
+    fields = text.replace('\n', ',\n,').split(',')
+    if len(fields) != step * rows + 1 or fields[layout.width::step].count('\n') != rows:
+        return None  # Some row has the wrong number of columns (or is blank)
+    columns = [fields[i::step] for i in range(layout.width)]
+    try:
+        for i in layout.numbers:
+            columns[i] = list(map(float, columns[i]))
+    except ValueError:
+        return None  # A number that doesn't parse
+    return columns
+
+
+def _csv_rows(text: str, check: Check, errors: RowErrors, line: int) -> Iterator[tuple]:
+    """Checked rows of a block through csv.reader; line is how many lines came before the block."""
+    reader = csv.reader(io.StringIO(text, newline=''))
+    for row in reader:
+        checked = check(row, errors, line + reader.line_num)
+        if checked is not None:
+            yield checked
+
+
+def parse_range(check: Check, path: str, start: int, end: int, layout: Optional[Layout] = None) -> Tuple[int, tuple, dict, dict]:
+    """Worker: check the rows between two byte offsets of a file.
+
+    Returns (lines read, packed columns, error counts, error examples). Line numbers in the
+    errors count from the start of the range; the caller shifts them.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    errors = RowErrors(path)
+    collecting = gc.isenabled()
+    gc.disable()  # Only new strings and tuples here, nothing to free; the collector would just rescan them
+    try:
+        if layout is not None:
+            rows = list(_block_rows(data, 0, len(data), check, layout, errors, 0))
+        else:
+            rows = list(_csv_rows(data.decode(), check, errors, 0))
+        return data.count(b'\n'), _pack([list(column) for column in zip(*rows)]), errors.counts, errors.examples
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _pack(columns: List[list]) -> tuple:
+    """Columns that pickle fast: floats as raw array bytes, text joined into one string.
+
+    Sending a million small strings between processes costs more than parsing them, so each
+    column travels as one object and is split again on the other side.
+    """
+    packed = []
+    for column in columns:
+        if isinstance(column[0], float):
+            packed.append(('d', array('d', column).tobytes()))
+            continue
+        joined = SEPARATOR.join(column)
+        if joined.count(SEPARATOR) == len(column) - 1:
+            packed.append(('s', joined))
+        else:
+            packed.append(('l', column))  # Some value contains the separator itself: send it as a list
+    return (len(columns[0]) if columns else 0), packed
+
+
+def _unpack(packed: tuple) -> Iterator[tuple]:
+    count, columns = packed
+    if not count:
+        return iter(())
+    unpacked = []
+    for kind, data in columns:
+        if kind == 'd':
+            numbers = array('d')
+            numbers.frombytes(data)
+            unpacked.append(numbers.tolist())
+        elif kind == 's':
+            unpacked.append(data.split(SEPARATOR))
+        else:
+            unpacked.append(data)
+    return zip(*unpacked)
+
+
+def iter_rows(pattern: str, check: Check, jobs: int = 1, layout: Optional[Layout] = None,
+              min_bytes: int = 4 << 20) -> Iterator[tuple]:
+    """Checked rows of every file matching pattern, in file order then row order.
+
+    jobs=1 reads the files one after another in this process. With more jobs, each file is cut
+    into byte ranges (see split_ranges) and the ranges are parsed by a pool of worker processes.
+    With a layout, quote-free files are scanned (see scan_rows) instead of going through csv.reader.
+    Either way each file gets one summary warning for its bad rows, with real line numbers.
+    """
+    paths = expand_paths(pattern)
+    if jobs <= 1:
+        for path in paths:
+            yield from scan_rows(path, check, layout) if layout is not None else read_rows(path, check)
+        return
+    pieces = [(path, start, end) for path in paths for start, end in split_ranges(path, jobs, min_bytes)]
+    from concurrent.futures import ProcessPoolExecutor  # Several Python processes working at once (slow to import)
+    with ProcessPoolExecutor(max_workers=min(jobs, len(pieces))) as pool:
+        results = pool.map(parse_range, [check] * len(pieces), *zip(*pieces), [layout] * len(pieces))  # Same order as sent
+        errors, line = None, 0
+        for (path, _, _), (lines, packed, counts, examples) in zip(pieces, results):
+            if errors is None or errors.source != path:
+                if errors is not None:
+                    errors.report(logger)
+                errors, line = RowErrors(path), 1  # Line 1 is the header
+            errors.merge(counts, examples, line)
+            line += lines
+            yield from _unpack(packed)
+        if errors is not None:
+            errors.report(logger)
+
+
+def mark_file(path: str) -> FileMark:
+    """FileMark for a file as it is now, up to the end of its last complete line.
+
+    An unfinished last line (a writer in the middle of appending) is left for next time.
+    """
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return FileMark(0, 0, 0)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offset = mm.rfind(b'\n') + 1
+            crc, lines = _crc_lines(mm, 0, offset, 0)
+    return FileMark(offset, crc, lines)
+
+
+def read_appended(path: str, mark: FileMark, check: Check, layout: Layout) -> Optional[Tuple[List[tuple], FileMark]]:
+    """Checked rows added to a file since mark, and the new mark.
+
+    None if the part before mark is gone or different (the file was truncated or rewritten),
+    or if nothing had been read yet: then the only safe thing is to read the whole file again.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not mark.offset or size < mark.offset:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if _crc_lines(mm, 0, mark.offset, 0)[0] != mark.crc:
+                return None  # Same length or longer, but what we read before has changed
+            end = mm.rfind(b'\n', mark.offset) + 1  # Only whole lines; an unfinished one waits for next time
+            if end <= mark.offset:
+                return [], mark
+            errors = RowErrors(path)
+            try:
+                rows = list(_block_rows(mm, mark.offset, end, check, layout, errors, mark.lines))
+            finally:
+                errors.report(logger)
+            crc, lines = _crc_lines(mm, mark.offset, end, mark.crc)
+    return rows, FileMark(end, crc, mark.lines + lines)
+
+
+def _crc_lines(buf, start: int, end: int, crc: int, chunk_bytes: int = 1 << 20) -> Tuple[int, int]:
+    """crc32 of buf[start:end] (carried on from crc) and how many line ends it has, a chunk at a time."""
+    lines = 0
+    for at in range(start, end, chunk_bytes):
+        chunk = buf[at:min(at + chunk_bytes, end)]
+        crc = zlib.crc32(chunk, crc)
+        lines += chunk.count(b'\n')
+    return crc, lines
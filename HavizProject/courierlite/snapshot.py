@@ -0,0 +1,176 @@
+import glob  # Parcel and rider paths may be patterns like parcels-*.csv
+import json  # The snapshot header is a small JSON document
+import mmap  # Map the file into memory instead of reading it
+import os
+import struct  # Pack fixed-size numbers into bytes
+from functools import cached_property  # Work out a value the first time it's asked for, then keep it
+from typing import Dict, List, Optional, Tuple
+from engine import HubRepo, RiderRepo, load_hubs, load_riders, load_pickups, load_parcel_store
+from shards import is_pattern
+from models import Hub, Rider, PickupPoint, CampusKiosk, DormLocker, OfficeDesk
+from store import ParcelStore, StringTable
+
+# Snapshot: a ready-to-use copy of all the CSVs in one binary file, like a photo of the loaded data.
+#
+# Layout:  MAGIC | version (u32) | header length (u32) | header JSON | padding | column sections...
+# The header holds the source file stamps, the small tables (hubs, riders, pickups, interned codes)
+# and where each parcel column starts. Columns are raw array bytes, 8-byte aligned, so they can be
+# used straight from the mapped file.
+
+MAGIC = b'CLSNAP\0\0'
+VERSION = 1
+_PREFIX = struct.Struct('<8sII')
+_PICKUP_KINDS = {cls.__name__: cls for cls in (PickupPoint, CampusKiosk, DormLocker, OfficeDesk)}
+
+
+def source_stamps(sources: Dict[str, Optional[str]]) -> Dict[str, Optional[List]]:
+    """(absolute path, size, mtime) for each source CSV. A change in any of them invalidates a snapshot."""
+    stamps = {}
+    for name, path in sources.items():
+        if path is not None and is_pattern(path):  # A glob: stamp every matching shard
+            stamps[name] = [_stamp(p) for p in sorted(glob.glob(path))] or None
+            continue
+        if path is None or not os.path.exists(path):
+            stamps[name] = None
+            continue
+        stamps[name] = _stamp(path)
+    return stamps
+
+
+def _stamp(path: str) -> List:
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+
+
+def build_snapshot(out_path: str, hubs_path: str, parcels_path: str, riders_path: str,
+                   pickups_path: Optional[str] = None) -> int:
+    """Load the CSVs once and write them as a snapshot. Returns the number of parcels written."""
+    return len(write_snapshot(out_path, hubs_path, parcels_path, riders_path, pickups_path)[1])
+
+
+def write_snapshot(out_path: str, hubs_path: str, parcels_path: str, riders_path: str,
+                   pickups_path: Optional[str] = None) -> Tuple[HubRepo, ParcelStore, RiderRepo, Dict[str, PickupPoint]]:
+    """Like build_snapshot, but returns what was loaded: (hubs, parcels, riders, pickups).
+
+    If a CSV changes during the build, the snapshot is stale before it's finished and open_snapshot
+    won't take it; the returned repos can still be used for this run.
+    """
+    sources = {'hubs': hubs_path, 'parcels': parcels_path, 'riders': riders_path, 'pickups': pickups_path}
+    stamps = source_stamps(sources)  # Stamp before reading, so an edit during the build makes it stale
+    hubs = load_hubs(hubs_path)
+    riders = load_riders(riders_path)
+    pickups = load_pickups(pickups_path, hubs)
+    store = load_parcel_store(parcels_path)
+
+    ids_blob, ids_starts, ids_lengths = store.parcel_ids.buffers()
+    rec_blob, rec_starts, rec_lengths = store.recipients.buffers()
+    columns = [
+        ('ids_blob', 'B', bytes(ids_blob)), ('ids_starts', 'Q', ids_starts), ('ids_lengths', 'I', ids_lengths),
+        ('rec_blob', 'B', bytes(rec_blob)), ('rec_starts', 'Q', rec_starts), ('rec_lengths', 'I', rec_lengths),
+        ('hub_codes', 'I', store.hub_codes), ('priority_codes', 'H', store.priority_codes),
+        ('destination_codes', 'I', store.destination_codes), ('weights', 'd', store.weights),
+    ]
+    header = {
+        'sources': stamps,
+        'hubs': [h.to_row() for h in hubs.all()],
+        'riders': [r.to_row() for r in riders.all()],
+        'pickups': [(type(p).__name__,) + p.to_row() for p in pickups.values()],
+        'interned': {'hubs': store.hubs.values, 'priorities': store.priorities.values,
+                     'destinations': store.destinations.values},
+        'columns': [],
+    }
+    # Column offsets depend on the header size, so lay out the columns relative to the data start first
+    offset = 0
+    for name, typecode, data in columns:
+        nbytes = len(memoryview(data).cast('B'))
+        header['columns'].append([name, typecode, offset, nbytes])
+        offset += nbytes + (-nbytes % 8)
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_start = _PREFIX.size + len(header_bytes)
+    data_start += -data_start % 8
+
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (data_start - f.tell()))
+        for name, typecode, data in columns:
+            raw = memoryview(data).cast('B')
+            f.write(raw)
+            f.write(b'\0' * (-len(raw) % 8))
+    os.replace(tmp_path, out_path)  # Readers never see a half-written snapshot
+    return hubs, store, riders, pickups
+
+
+class Snapshot:
+    """A mapped snapshot file. Repos are built the first time they're used."""
+    def __init__(self, path: str, header: dict, mm: mmap.mmap, data_start: int):
+        self.path = path
+        self._header = header
+        self._mmap = mm
+        self._data_start = data_start
+
+    def _column(self, name: str):
+        for col_name, typecode, offset, nbytes in self._header['columns']:
+            if col_name == name:
+                start = self._data_start + offset
+                return memoryview(self._mmap)[start:start + nbytes].cast(typecode)
+        raise KeyError(name)
+
+    @cached_property
+    def hubs(self) -> HubRepo:
+        repo = HubRepo()
+        for row in self._header['hubs']:
+            repo.add(Hub(*row))
+        return repo
+
+    @cached_property
+    def riders(self) -> RiderRepo:
+        repo = RiderRepo()
+        for row in self._header['riders']:
+            repo.add(Rider(*row))
+        return repo
+
+    @cached_property
+    def pickups(self) -> Dict[str, PickupPoint]:
+        pickups = {}
+        for kind, pickup_id, label, hub_id, bias in self._header['pickups']:
+            cls = _PICKUP_KINDS[kind]
+            if cls is PickupPoint:
+                pickups[pickup_id] = PickupPoint(pickup_id, hub_id, label, bias)
+            else:
+                pickups[pickup_id] = cls(pickup_id, hub_id, label)
+        return pickups
+
+    @cached_property
+    def parcels(self) -> ParcelStore:
+        """Read-only ParcelStore whose columns point straight into the mapped file."""
+        interned = self._header['interned']
+        return ParcelStore.from_columns(
+            StringTable.from_buffers(self._column('ids_blob'), self._column('ids_starts'), self._column('ids_lengths')),
+            StringTable.from_buffers(self._column('rec_blob'), self._column('rec_starts'), self._column('rec_lengths')),
+            interned['hubs'], interned['priorities'], interned['destinations'],
+            self._column('hub_codes'), self._column('priority_codes'), self._column('destination_codes'),
+            self._column('weights'))
+
+
+def open_snapshot(path: str, hubs_path: str, parcels_path: str, riders_path: str,
+                  pickups_path: Optional[str] = None) -> Optional[Snapshot]:
+    """Map a snapshot if it exists, has our version, and matches the source CSVs. Otherwise None."""
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None  # Missing or empty file
+    if len(mm) < _PREFIX.size:
+        return None
+    magic, version, header_len = _PREFIX.unpack_from(mm, 0)
+    if magic != MAGIC or version != VERSION:
+        return None
+    header = json.loads(mm[_PREFIX.size:_PREFIX.size + header_len])
+    sources = {'hubs': hubs_path, 'parcels': parcels_path, 'riders': riders_path, 'pickups': pickups_path}
+    if header['sources'] != source_stamps(sources):
+        return None  # A CSV changed size or mtime (or different files were asked for)
+    data_start = _PREFIX.size + header_len
+    data_start += -data_start % 8
+    return Snapshot(path, header, mm, data_start)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+from array import array  # Compact lists of plain numbers, no Python object per item
+from itertools import compress, repeat  # compress keeps the items where a matching flag is True
+from operator import eq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from models import Parcel
+
+# Column-based parcel storage: like a spreadsheet kept as columns instead of one card per parcel.
+# At millions of parcels, one Python object per parcel eats most of the memory.
+# Here each field is one compact column and a parcel is just a row number.
+
+
+class StringTable:
+    """Many strings packed into one bytes buffer. Row i is blob[starts[i]:starts[i] + lengths[i]]."""
+    def __init__(self):
+        self._blob = bytearray()
+        self._starts = array('Q')
+        self._lengths = array('I')
+
+    @classmethod
+    def from_buffers(cls, blob, starts, lengths) -> 'StringTable':
+        """Wrap existing buffers (e.g. memoryviews over a snapshot) without copying."""
+        table = cls()
+        table._blob, table._starts, table._lengths = blob, starts, lengths
+        return table
+
+    def buffers(self) -> Tuple:
+        """(blob, starts, lengths) – the raw pieces, for writing to disk."""
+        return self._blob, self._starts, self._lengths
+
+    def append(self, text: str) -> int:
+        data = text.encode('utf-8')
+        self._starts.append(len(self._blob))
+        self._lengths.append(len(data))
+        self._blob += data
+        return len(self._starts) - 1
+
+    def set(self, i: int, text: str):
+        """Point row i at a new string (the old bytes are just left behind)."""
+        data = text.encode('utf-8')
+        self._starts[i] = len(self._blob)
+        self._lengths[i] = len(data)
+        self._blob += data
+
+    def __getitem__(self, i: int) -> str:
+        start = self._starts[i]
+        return str(self._blob[start:start + self._lengths[i]], 'utf-8')
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+
+class Interner:
+    """Gives each distinct string a small integer code, like numbering the hubs once."""
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ParcelStore:
+    """Array-backed alternative to ParcelRepo. Same get/all/ids/exists, plus row filters."""
+    PRIORITIES = ('EXPRESS', 'NORMAL')
+
+    def __init__(self):
+        self.parcel_ids = StringTable()
+        self.recipients = StringTable()
+        self.hubs = Interner()
+        self.priorities = Interner(self.PRIORITIES)  # EXPRESS is always code 0, NORMAL code 1
+        self.destinations = Interner()
+        self.hub_codes = array('I')
+        self.priority_codes = array('H')
+        self.destination_codes = array('I')
+        self.weights = array('d')  # Kept as full floats so weight checks match Parcel exactly
+        self._row_index: Optional[Dict[str, int]] = {}  # parcel_id -> row number, None until needed
+
+    @classmethod
+    def from_columns(cls, parcel_ids: StringTable, recipients: StringTable, hubs: List[str], priorities: List[str],
+                     destinations: List[str], hub_codes, priority_codes, destination_codes, weights) -> 'ParcelStore':
+        """Wrap ready-made columns (arrays or memoryviews). Read-only if the columns are."""
+        store = cls()
+        store.parcel_ids, store.recipients = parcel_ids, recipients
+        store.hubs, store.priorities, store.destinations = Interner(hubs), Interner(priorities), Interner(destinations)
+        store.hub_codes, store.priority_codes = hub_codes, priority_codes
+        store.destination_codes, store.weights = destination_codes, weights
+        store._row_index = None  # Built on the first lookup by ID
+        return store
+
+    @property
+    def _rows(self) -> Dict[str, int]:
+        if self._row_index is None:
+            ids = self.parcel_ids
+            self._row_index = {ids[row]: row for row in range(len(ids))}
+        return self._row_index
+
+    def append(self, parcel_id: str, recipient: str, priority: str, hub_id: str, destination: str, weight_kg: float):
+        """Add or replace a parcel, same as ParcelRepo.add but without building a Parcel."""
+        priority = priority.upper()  # Same rule as Parcel
+        row = self._rows.get(parcel_id)
+        if row is not None:
+            self.recipients.set(row, recipient)
+            self.hub_codes[row] = self.hubs.code(hub_id)
+            self.priority_codes[row] = self.priorities.code(priority)
+            self.destination_codes[row] = self.destinations.code(destination)
+            self.weights[row] = weight_kg
+            return
+        self._rows[parcel_id] = self.parcel_ids.append(parcel_id)
+        self.recipients.append(recipient)
+        self.hub_codes.append(self.hubs.code(hub_id))
+        self.priority_codes.append(self.priorities.code(priority))
+        self.destination_codes.append(self.destinations.code(destination))
+        self.weights.append(weight_kg)
+
+    def add(self, obj: Parcel):
+        self.append(*obj.to_row())
+
+    def parcel(self, row: int) -> Parcel:
+        """Build a Parcel object for one row."""
+        return Parcel(self.parcel_ids[row], self.recipients[row], self.priorities.values[self.priority_codes[row]],
+                      self.hubs.values[self.hub_codes[row]], self.destinations.values[self.destination_codes[row]],
+                      self.weights[row])
+
+    def get(self, id: str) -> Optional[Parcel]:
+        row = self._rows.get(id)
+        return None if row is None else self.parcel(row)
+
+    def all(self) -> List[Parcel]:
+        return [self.parcel(row) for row in range(len(self))]
+
+    def exists(self, id: str) -> bool:
+        return id in self._rows
+
+    def ids(self) -> Set[str]:
+        return set(self._rows)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    # Vectorized filters: compare a whole column to one code, no Parcel objects involved.
+    def rows_where(self, hub_id: Optional[str] = None, priority: Optional[str] = None,
+                   destination: Optional[str] = None) -> array:
+        """Row numbers matching every given field, in row order."""
+        rows = range(len(self))
+        for column, interner, value in ((self.hub_codes, self.hubs, hub_id),
+                                        (self.priority_codes, self.priorities, priority and priority.upper()),
+                                        (self.destination_codes, self.destinations, destination)):
+            if value is None:
+                continue
+            code = interner.codes.get(value)
+            if code is None:
+                return array('I')
+            if isinstance(rows, range):
+                rows = array('I', compress(rows, map(eq, column, repeat(code))))
+            else:
+                rows = array('I', [row for row in rows if column[row] == code])
+        return rows if isinstance(rows, array) else array('I', rows)
+
+    def group_rows(self) -> Dict[str, Dict[str, array]]:
+        """Rows grouped as {hub_id: {'EXPRESS': rows, 'NORMAL': rows}} in one pass over two columns."""
+        groups = [(array('I'), array('I')) for _ in self.hubs.values]
+        express_code = self.priorities.codes['EXPRESS']
+        normal_code = self.priorities.codes['NORMAL']
+        for row, (hub_code, priority_code) in enumerate(zip(self.hub_codes, self.priority_codes)):
+            if priority_code == express_code:
+                groups[hub_code][0].append(row)
+            elif priority_code == normal_code:
+                groups[hub_code][1].append(row)
+        return {self.hubs.values[code]: {'EXPRESS': express, 'NORMAL': normal}
+                for code, (express, normal) in enumerate(groups)}
@@ -0,0 +1,205 @@
+from __future__ import annotations
+from bisect import bisect_left, insort  # Fast search in a sorted list
+import heapq  # A pile where the biggest (or smallest) is always on top
+import sys
+from typing import Dict, List, Tuple
+
+# A strategy decides which rider gets which parcel at ONE hub.
+# It only ever sees numbers: each rider's max load (caps) and each parcel's weight,
+# in the hub's queue order (EXPRESS parcels first, then NORMAL).
+# It answers with picks: (parcel position, rider position) in the order handed out.
+Picks = List[Tuple[int, int]]
+
+# The original round robin re-summed each rider's parcels with sum() on every try. From Python 3.12,
+# sum() of floats carries the rounding error along (Neumaier summation), so 0.1 + 0.2 + 0.3 comes out
+# as 0.6 instead of 0.6000000000000001. Whether a parcel right at a rider's limit fits depends on that,
+# so the round-robin ledger adds weights the same way the running Python's sum() does.
+COMPENSATED_SUM = sys.version_info >= (3, 12)
+
+
+def add_load(totals: List[float], carries: List[float], k: int, weight: float) -> float:
+    """Add weight to rider k like sum() does on Python 3.12+. Returns what sum() would give for the rider now."""
+    total = totals[k]
+    t = total + weight
+    if abs(total) >= abs(weight):
+        carries[k] += (total - t) + weight  # The bit of weight lost in rounding
+    else:
+        carries[k] += (weight - t) + total  # The bit of total lost in rounding
+    totals[k] = t
+    return t + carries[k] if carries[k] else t
+
+
+class AssignmentStrategy:
+    """Base class for assignment strategies. Like a rule for packing bags."""
+    name = ''
+
+    def fill(self, caps: List[float], weights: List[float], express_count: int) -> Tuple[Picks, List[int]]:
+        """Return (picks, touched). touched lists every rider position that was looked at."""
+        raise NotImplementedError
+
+    def order(self, weights: List[float], express_count: int) -> List[int]:
+        """Order to try parcels in. Default: the queue order as given."""
+        return list(range(len(weights)))
+
+
+class RoundRobin(AssignmentStrategy):
+    """Take turns, like dealing cards. The original CourierLite rule."""
+    name = 'round_robin'
+
+    def fill(self, caps, weights, express_count):
+        # Running-load ledger: like a notebook of how full each bag is.
+        # Riders that can't fit even the lightest parcel left are dropped from the ring,
+        # and once nobody has room the rest of the queue is left unassigned in one go.
+        n = len(caps)
+        loads = [0.0] * n  # How full each rider is right now, exactly as sum() of their parcels would say
+        totals, carries = [0.0] * n, [0.0] * n  # Only used when sum() is compensated (see add_load)
+        seen = [False] * n
+        active = list(range(n))  # Riders still in the ring, in rider order
+        # lightest[i] = lightest parcel from position i onward
+        lightest = [float('inf')] * (len(weights) + 1)
+        for i in range(len(weights) - 1, -1, -1):
+            lightest[i] = min(weights[i], lightest[i + 1])
+
+        picks = []
+        pos = 0  # Whose turn it is (position in the full rider list)
+        for i, weight in enumerate(weights):
+            if not active:
+                break  # Everyone is full – the rest stay unassigned
+            j = bisect_left(active, pos)
+            if j == len(active):
+                j = 0
+            assigned = False
+            for _ in range(len(active)):
+                k = active[j]
+                seen[k] = True
+                if loads[k] + weight <= caps[k]:
+                    if COMPENSATED_SUM:
+                        loads[k] = add_load(totals, carries, k, weight)
+                    else:
+                        loads[k] += weight
+                    picks.append((i, k))
+                    assigned = True
+                    pos = (k + 1) % n
+                    if loads[k] + lightest[i + 1] > caps[k]:
+                        del active[j]  # Full for good
+                    break
+                if loads[k] + lightest[i] > caps[k]:
+                    del active[j]  # Can't take anything that's left
+                else:
+                    j += 1
+                if j >= len(active):
+                    j = 0
+            if not assigned:
+                pos = (pos + 1) % n
+        return picks, [k for k in range(n) if seen[k]]
+
+
+class FirstFitDecreasing(AssignmentStrategy):
+    """Heaviest parcels first, each to the first rider (by ID) with room."""
+    name = 'first_fit_decreasing'
+
+    def order(self, weights, express_count):
+        # Sort heavy-to-light, but never let a NORMAL parcel jump ahead of an EXPRESS one
+        express = sorted(range(express_count), key=lambda i: -weights[i])
+        normal = sorted(range(express_count, len(weights)), key=lambda i: -weights[i])
+        return express + normal
+
+    def fill(self, caps, weights, express_count):
+        n = len(caps)
+        if n == 0 or not weights:
+            return [], []
+        loads = [0.0] * n
+        # Tournament tree of "most room left" so finding the first rider with room is O(log n)
+        size = 1
+        while size < n:
+            size *= 2
+        room = [float('-inf')] * (2 * size)
+        for k in range(n):
+            room[size + k] = caps[k]
+        for node in range(size - 1, 0, -1):
+            room[node] = max(room[2 * node], room[2 * node + 1])
+
+        def first_fit(node, weight):
+            if room[node] < weight:
+                return -1
+            if node >= size:
+                k = node - size
+                return k if loads[k] + weight <= caps[k] else -1
+            k = first_fit(2 * node, weight)
+            return k if k >= 0 else first_fit(2 * node + 1, weight)
+
+        picks = []
+        for i in self.order(weights, express_count):
+            k = first_fit(1, weights[i])
+            if k < 0:
+                continue
+            loads[k] += weights[i]
+            picks.append((i, k))
+            node = size + k
+            room[node] = caps[k] - loads[k]
+            node //= 2
+            while node:
+                room[node] = max(room[2 * node], room[2 * node + 1])
+                node //= 2
+        return picks, list(range(n))
+
+
+class BestFit(AssignmentStrategy):
+    """Each parcel to the rider it fills up most snugly (least room left after)."""
+    name = 'best_fit'
+
+    def fill(self, caps, weights, express_count):
+        n = len(caps)
+        if n == 0 or not weights:
+            return [], []
+        loads = [0.0] * n
+        rooms = sorted((caps[k], k) for k in range(n))  # Sorted by room left
+        picks = []
+        for i in self.order(weights, express_count):
+            weight = weights[i]
+            j = bisect_left(rooms, (weight, -1))  # Tightest rider that might fit
+            while j < len(rooms) and loads[rooms[j][1]] + weight > caps[rooms[j][1]]:
+                j += 1  # Rounding said "maybe", the real rule said "no"
+            if j == len(rooms):
+                continue
+            k = rooms.pop(j)[1]
+            loads[k] += weight
+            picks.append((i, k))
+            insort(rooms, (caps[k] - loads[k], k))
+        return picks, list(range(n))
+
+
+class WorstFit(AssignmentStrategy):
+    """Each parcel to the rider with the most room left. Spreads the load evenly."""
+    name = 'worst_fit'
+
+    def fill(self, caps, weights, express_count):
+        n = len(caps)
+        if n == 0 or not weights:
+            return [], []
+        loads = [0.0] * n
+        heap = [(-caps[k], k) for k in range(n)]  # Max-heap on room left
+        heapq.heapify(heap)
+        picks = []
+        for i in self.order(weights, express_count):
+            weight = weights[i]
+            k = heap[0][1]
+            if loads[k] + weight > caps[k]:
+                continue  # Even the emptiest rider can't take it
+            loads[k] += weight
+            picks.append((i, k))
+            heapq.heapreplace(heap, (loads[k] - caps[k], k))
+        return picks, list(range(n))
+
+
+STRATEGIES: Dict[str, AssignmentStrategy] = {
+    s.name: s for s in (RoundRobin(), FirstFitDecreasing(), BestFit(), WorstFit())
+}
+
+
+def get_strategy(name: str) -> AssignmentStrategy:
+    """Look up a strategy by name, like picking a rule from a menu."""
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown strategy {name!r}, pick one of: {', '.join(STRATEGIES)}") from None
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Tracing: a stopwatch for each step, like writing down when every job starts and ends.
+# Spans are saved in Chrome's trace-event format, so the file opens in chrome://tracing or ui.perfetto.dev.
+# When tracing is off, span() hands back one shared do-nothing object, so it costs next to nothing.
+
+
+class _NullSpan:
+    """What span() returns when tracing is off. Does nothing, very quickly."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed step. Use as `with span('load_parcels') as s: ...; s.set(items=n)`."""
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start', 'cpu_start')
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.cpu_start = time.thread_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        cpu_ms = (time.thread_time() - self.cpu_start) * 1000
+        self.args['cpu_ms'] = round(cpu_ms, 3)
+        self.tracer.record(self.name, self.cat, self.start, end, self.args)
+        return False
+
+    def set(self, **args):
+        """Attach extra numbers (like item counts) to the span."""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects finished spans as Chrome 'complete' (ph='X') events."""
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, cat: str, start: float, end: float, args: dict):
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                 'ts': round((start - self.origin) * 1e6, 3), 'dur': round((end - start) * 1e6, 3), 'args': args}
+        with self._lock:
+            self.events.append(event)
+
+    def write(self, path: str):
+        import json  # Trace files are JSON; only needed here
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+
+_tracer: Optional[Tracer] = None  # None means tracing is off
+
+
+def enable() -> Tracer:
+    """Turn tracing on (a fresh tracer) and return it."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable() -> Optional[Tracer]:
+    """Turn tracing off and return the tracer that was collecting, if any."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def span(name: str, cat: str = 'courierlite', **args):
+    """A timed step when tracing is on, a shared no-op otherwise."""
+    if _tracer is None:
+        return _NULL_SPAN
+    return Span(_tracer, name, cat, args)
@@ -0,0 +1,158 @@
+"""assign_parcels gives the same answer as the original round-robin loop (kept below as the reference).
+
+Inputs are seeded random CSV files with repeated parcel IDs, riders who can't carry anything,
+riders at hubs with no parcels, and PICKUP: destinations that aren't in the pickups file.
+Run from the HavizProject folder: python -m pytest -q tests
+"""
+import logging
+import os
+import random
+import sys
+from collections import defaultdict
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+from engine import assign_parcels, assign_parcels_chunked, load_hubs, load_parcel_store, load_parcels, load_pickups, load_riders
+
+logging.disable(logging.WARNING)  # Unknown pickups are on purpose here
+
+SEEDS = range(40)
+
+
+def reference_assign(riders, parcels, pickups):
+    """The original assign_parcels loop: re-sums each rider's load on every try."""
+    riders_by_hub = defaultdict(list)  # Group riders by hub
+    for rider in riders.all():
+        riders_by_hub[rider.home_hub_id].append(rider)
+    for hub in riders_by_hub:
+        riders_by_hub[hub].sort(key=lambda r: r.rider_id)  # Sort by ID
+
+    parcels_by_hub = defaultdict(lambda: {'EXPRESS': [], 'NORMAL': []})  # Group parcels
+    for parcel in parcels.all():
+        parcels_by_hub[parcel.hub_id][parcel.priority].append(parcel)
+
+    assignments = defaultdict(list)  # Who gets what
+    unassigned = set()  # Parcels that couldn't be delivered
+
+    for hub_id, hub_riders in riders_by_hub.items():
+        if not hub_riders:
+            continue
+        rider_index = 0
+        for priority in ['EXPRESS', 'NORMAL']:
+            hub_parcels = parcels_by_hub[hub_id][priority]
+            # Sort by pickup bias for same priority
+            def sort_key(p):
+                bias = 0
+                if 'PICKUP:' in p.destination:
+                    pickup_id = p.destination.split('PICKUP:')[1]
+                    if pickup_id in pickups:
+                        bias = pickups[pickup_id].base_priority_bias
+                return (-bias, p.parcel_id)  # Higher bias first
+            hub_parcels.sort(key=sort_key)
+
+            for parcel in hub_parcels:
+                assigned = False
+                for _ in range(len(hub_riders)):
+                    rider = hub_riders[rider_index]
+                    current_load = sum(p.weight_kg for p in assignments[rider.rider_id])
+                    if current_load + parcel.weight_kg <= rider.max_load_kg:
+                        assignments[rider.rider_id].append(parcel)
+                        assigned = True
+                        break
+                    rider_index = (rider_index + 1) % len(hub_riders)
+                if not assigned:
+                    unassigned.add(parcel.parcel_id)
+                rider_index = (rider_index + 1) % len(hub_riders)
+
+    return dict(assignments), unassigned
+
+
+def write_inputs(folder, seed: int) -> dict:
+    """Small random hubs/riders/parcels/pickups CSVs. Returns their paths."""
+    rnd = random.Random(seed)
+    hub_ids = [f'H{k}' for k in range(1, rnd.randint(1, 5) + 1)]
+    paths = {name: os.path.join(folder, f'{name}.csv') for name in ('hubs', 'riders', 'parcels', 'pickups')}
+    with open(paths['hubs'], 'w') as f:
+        f.write('hub_id,hub_name,campus\n')
+        f.writelines(f'{hub_id},Hub {hub_id},UCU\n' for hub_id in hub_ids)
+    with open(paths['pickups'], 'w') as f:
+        f.write('pickup_id,label,hub_id,base_priority_bias\n')
+        f.writelines(f'K{k},Kiosk {k},{rnd.choice(hub_ids)},{rnd.randint(-2, 3)}\n' for k in range(1, 4))
+    with open(paths['riders'], 'w') as f:
+        f.write('rider_id,name,max_load_kg,home_hub_id\n')
+        for k in range(rnd.randint(1, 12)):
+            cap = rnd.choice([0.0, 0.5, 1.0, 2.0, 5.0, 10.0, round(rnd.uniform(0, 15), 1)])  # Some riders carry nothing
+            f.write(f'R{k},Rider {k},{cap},{rnd.choice(hub_ids + ["H9"])}\n')  # H9: riders, no parcels
+    with open(paths['parcels'], 'w') as f:
+        f.write('parcel_id,recipient,priority,hub_id,destination,weight_kg\n')
+        count = rnd.randint(0, 80)
+        for k in range(count):
+            parcel_id = f'P{rnd.randint(0, count)}'  # Repeats: the last row of an ID wins
+            priority = rnd.choice(['EXPRESS', 'NORMAL', 'express', 'normal'])
+            destination = rnd.choice(['Sabiiti', 'Nsibambi', 'PICKUP:K1', 'PICKUP:K2', 'PICKUP:K3', 'PICKUP:X7'])
+            weight = rnd.choice([0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 1.0, round(rnd.uniform(0.1, 6), 2)])  # Tenths land on rounding edges
+            f.write(f'{parcel_id},Someone,{priority},{rnd.choice(hub_ids)},{destination},{weight}\n')
+    return paths
+
+
+def ids_of(assignments):
+    return {rider_id: [p.parcel_id for p in parcels] for rider_id, parcels in assignments.items()}
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_round_robin_matches_reference(tmp_path, seed):
+    paths = write_inputs(tmp_path, seed)
+    hubs = load_hubs(paths['hubs'])
+    riders = load_riders(paths['riders'])
+    pickups = load_pickups(paths['pickups'], hubs)
+    parcels = load_parcels(paths['parcels'])
+    expected_assignments, expected_unassigned = reference_assign(riders, parcels, pickups)
+
+    for jobs in (1, 3):
+        assignments, unassigned = assign_parcels(hubs, riders, parcels, pickups, strategy='round_robin', jobs=jobs)
+        assert ids_of(assignments) == ids_of(expected_assignments)
+        assert unassigned == expected_unassigned
+
+    store = load_parcel_store(paths['parcels'])
+    assignments, unassigned = assign_parcels(hubs, riders, store, pickups, strategy='round_robin')
+    assert ids_of(assignments) == ids_of(expected_assignments)
+    assert unassigned == expected_unassigned
+
+
+def test_parcel_at_the_exact_limit(tmp_path):
+    # 0.1 + 0.2 + 0.3 is 0.6000000000000001 with plain adding but 0.6 with sum() on Python 3.12+,
+    # so whether the 0.4 kg parcel fits a 1.0 kg rider depends on the Python, and must match the original loop.
+    paths = write_inputs(tmp_path, seed=0)
+    with open(paths['riders'], 'w') as f:
+        f.write('rider_id,name,max_load_kg,home_hub_id\nR1,Sunday,1.0,H1\n')
+    with open(paths['parcels'], 'w') as f:
+        f.write('parcel_id,recipient,priority,hub_id,destination,weight_kg\n'
+                'P1,Ann,EXPRESS,H1,Sabiiti,0.1\nP2,Ann,EXPRESS,H1,Sabiiti,0.2\n'
+                'P3,Ann,EXPRESS,H1,Sabiiti,0.3\nP4,Ann,EXPRESS,H1,Sabiiti,0.4\n')
+    hubs, riders = load_hubs(paths['hubs']), load_riders(paths['riders'])
+    pickups, parcels = load_pickups(paths['pickups'], hubs), load_parcels(paths['parcels'])
+    expected_assignments, expected_unassigned = reference_assign(riders, parcels, pickups)
+    assert expected_unassigned == (set() if sum([0.1, 0.2, 0.3]) + 0.4 <= 1.0 else {'P4'})
+    for source in (parcels, load_parcel_store(paths['parcels'])):
+        assignments, unassigned = assign_parcels(hubs, riders, source, pickups)
+        assert ids_of(assignments) == ids_of(expected_assignments)
+        assert unassigned == expected_unassigned
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_chunked_matches_assign_parcels(tmp_path, seed):
+    paths = write_inputs(tmp_path, seed)
+    hubs = load_hubs(paths['hubs'])
+    riders = load_riders(paths['riders'])
+    pickups = load_pickups(paths['pickups'], hubs)
+    expected_assignments, expected_unassigned = assign_parcels(hubs, riders, load_parcels(paths['parcels']), pickups)
+
+    assignments, unassigned = {}, set()
+    for _, hub_assignments, hub_unassigned in assign_parcels_chunked(riders, paths['parcels'], pickups, chunk_size=7, partitions=3):
+        assignments.update(hub_assignments)
+        unassigned |= hub_unassigned
+    assert ids_of(assignments) == ids_of(expected_assignments)
+    assert unassigned == expected_unassigned
@@ -0,0 +1,115 @@
+"""Whole-run cache: a repeat --assign run with the same files prints the same answer without loading anything."""
+import logging
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+import cache as cache_module
+import cli
+import engine
+from cache import ResultCache, run_key
+from test_assign_parcels import write_inputs
+
+logging.disable(logging.WARNING)
+
+
+def run_cli(paths, cache_dir, capsys, *extra):
+    cli.main(['--hubs', paths['hubs'], '--parcels', paths['parcels'], '--riders', paths['riders'],
+              '--pickups', paths['pickups'], '--assign', '--preview', '--cache-dir', str(cache_dir), *extra])
+    return capsys.readouterr().out
+
+
+def test_repeat_run_skips_loading(tmp_path, capsys, monkeypatch):
+    paths = write_inputs(tmp_path, seed=5)
+    first = run_cli(paths, tmp_path / 'cache', capsys)
+    assert first == run_cli(paths, tmp_path / 'cache', capsys, '--no-cache')
+
+    def no_loading(*args, **kwargs):
+        raise AssertionError("a cached run should not load the CSVs")
+    monkeypatch.setattr(engine, 'load_parcels', no_loading)
+    assert run_cli(paths, tmp_path / 'cache', capsys) == first
+
+
+def test_changed_file_changes_the_key(tmp_path):
+    paths = write_inputs(tmp_path, seed=5)
+    sources = {name: [paths[name]] for name in ('hubs', 'parcels', 'riders', 'pickups')}
+    before = run_key('round_robin', sources)
+    assert run_key('best_fit', sources) != before
+    with open(paths['parcels'], 'a') as f:
+        f.write('P999,Someone,NORMAL,H1,Sabiiti,1.0\n')
+    assert run_key('round_robin', sources) != before
+
+
+def test_run_round_trip(tmp_path):
+    paths = write_inputs(tmp_path, seed=11)
+    hubs, riders = engine.load_hubs(paths['hubs']), engine.load_riders(paths['riders'])
+    assignments, unassigned = engine.assign_parcels(hubs, riders, engine.load_parcels(paths['parcels']),
+                                                    engine.load_pickups(paths['pickups'], hubs))
+    cache = ResultCache(str(tmp_path / 'cache'))
+    cache.put_run('key', assignments, unassigned, ['R0', 'R1'])
+    got_assignments, got_unassigned, rider_ids = cache.get_run('key')
+    assert {r: [p.to_row() for p in ps] for r, ps in got_assignments.items()} == \
+        {r: [p.to_row() for p in ps] for r, ps in assignments.items()}
+    assert got_unassigned == unassigned and rider_ids == ['R0', 'R1']
+    assert cache.get_run('other') is None
+
+
+def test_unusable_folder_turns_the_cache_off(tmp_path, capsys, monkeypatch):
+    paths = write_inputs(tmp_path, seed=5)
+    not_a_folder = tmp_path / 'hostname'
+    not_a_folder.write_text('courier-box\n')
+    expected = run_cli(paths, tmp_path / 'cache', capsys, '--no-cache')
+    assert run_cli(paths, not_a_folder / 'courierlite', capsys) == expected  # Like HOME=/etc/hostname
+
+    warnings = []
+    monkeypatch.setattr(cache_module.logger, 'warning', lambda *args: warnings.append(args))
+    cache = ResultCache(str(not_a_folder / 'courierlite'))
+    cache.put('key', ([(0, 0)], [0]))
+    cache.put_run('key', {}, set(), [])
+    assert not cache.enabled and len(warnings) == 1
+    assert cache.get('key') is None and cache.get_run('key') is None and cache.trim() == 0
+
+
+def test_folder_removed_during_the_run(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    (tmp_path / 'cache').rmdir()
+    cache.put('key', ([(0, 0)], [0]))  # No crash, the cache just stops
+    assert not cache.enabled
+
+
+def test_broken_entries_are_misses(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put('good', ([(0, 1), (2, 0)], [0, 1]))
+    assert cache.get('good') == ([(0, 1), (2, 0)], [0, 1])
+    data = (tmp_path / 'good.plan').read_bytes()
+    for name, raw in (('empty', b''), ('short', data[:8]), ('odd', data[:5]), ('negative', b'\xff' * 4)):
+        (tmp_path / f'{name}.plan').write_bytes(raw)
+        assert cache.get(name) is None
+    for name, text in (('empty', ''), ('list', '[]'), ('no_counts', '{"parcels": [], "weights": []}'),
+                       ('too_few', '{"counts": [["R1", 2]], "parcels": [["P1"], ["A"], ["NORMAL"], ["H1"], ["X"]],'
+                                   ' "weights": [1.0], "unassigned": [], "riders": ["R1"]}')):
+        (tmp_path / f'{name}.run').write_text(text)
+        assert cache.get_run(name) is None
+
+
+def test_trim_removes_stale_leftovers(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    old, new = tmp_path / 'a.plan.123.tmp', tmp_path / 'b.plan.456.tmp'
+    old.write_bytes(b'x')
+    new.write_bytes(b'x')
+    os.utime(old, (1, 1))
+    assert cache.trim() == 1
+    assert not old.exists() and new.exists()
+
+
+def test_trim_keeps_to_the_byte_limit(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10000)
+    for k in range(6):
+        (tmp_path / f'k{k}.run').write_bytes(b'x' * 3000)
+        os.utime(tmp_path / f'k{k}.run', (k + 1, k + 1))  # k0 used longest ago
+    assert cache.trim() == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['k3.run', 'k4.run', 'k5.run']
+    cache.put_run('huge', {'R1': [engine.Parcel('P1', 'A' * 3000, 'NORMAL', 'H1', 'X', 1.0)]}, set(), ['R1'])
+    assert cache.get_run('huge') is None  # More than a quarter of the limit: not kept
@@ -0,0 +1,17 @@
+"""cli.py --version and --help stay within the import budget and never load the engine (see benchmarks/check_import_budget.py)."""
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'benchmarks'))
+
+from check_import_budget import BUDGET_MS, FLAGS, measure
+
+
+@pytest.mark.parametrize('flag', FLAGS)
+def test_fast_path_imports(flag):
+    best, heavy = measure(flag)
+    assert heavy == [], f"cli.py {flag} loads {', '.join(heavy)}"
+    assert best <= BUDGET_MS, f"cli.py {flag} spends {best:.2f} ms importing (budget {BUDGET_MS} ms)"
@@ -0,0 +1,79 @@
+"""HubImprover: only time spent improving counts against the budget, so --out gets the same help as --assign."""
+import logging
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+import improve
+from engine import assign_parcels, iter_assignments, load_hubs, load_parcels, load_pickups, load_riders
+from test_assign_parcels import ids_of, write_inputs
+
+logging.disable(logging.WARNING)
+
+
+class FakeClock:
+    """Stands in for the time module: the clock only moves when the test says so."""
+    def __init__(self):
+        self.now = 1000.0
+
+    def perf_counter(self):
+        return self.now
+
+
+def write_tight_hubs(folder) -> dict:
+    """Two hubs where round robin leaves a 4 kg parcel out, but moving a 1 kg one makes room."""
+    paths = write_inputs(folder, seed=0)
+    with open(paths['hubs'], 'w') as f:
+        f.write('hub_id,hub_name,campus\nH1,Cafe,UCU\nH2,Library,UCU\n')
+    with open(paths['riders'], 'w') as f:
+        f.write('rider_id,name,max_load_kg,home_hub_id\n'
+                'R1,Sunday,4.0,H1\nR2,Moses,6.0,H1\nR3,Ann,4.0,H2\nR4,Joan,6.0,H2\n')
+    with open(paths['parcels'], 'w') as f:
+        f.write('parcel_id,recipient,priority,hub_id,destination,weight_kg\n')
+        for hub_id, first in (('H1', 1), ('H2', 4)):
+            for k, weight in enumerate((1.0, 3.0, 4.0)):  # 1 -> R1, 3 -> R2, then 4 fits nobody
+                f.write(f'P{first + k},Someone,NORMAL,{hub_id},Sabiiti,{weight}\n')
+    return paths
+
+
+def test_time_between_hubs_is_not_counted(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(improve, 'time', clock)
+    paths = write_tight_hubs(tmp_path)
+    hubs, riders = load_hubs(paths['hubs']), load_riders(paths['riders'])
+    pickups, parcels = load_pickups(paths['pickups'], hubs), load_parcels(paths['parcels'])
+    assignments, unassigned = assign_parcels(hubs, riders, parcels, pickups)
+    assert unassigned == {'P3', 'P6'}
+    expected, expected_left, expected_recovered = improve.improve_assignments(riders, parcels, assignments, unassigned, 50)
+    assert expected_recovered == 2 and expected_left == set()
+
+    improver = improve.HubImprover(riders, 50, len(riders.grouped_by_hub()))
+    got, left = {}, set()
+    for hub_id, hub_assignments, hub_unassigned in iter_assignments(hubs, riders, parcels, pickups):
+        clock.now += 10  # Planning this hub took far longer than the whole budget
+        hub_assignments, placed = improver.improve(hub_id, hub_assignments, map(parcels.get, hub_unassigned))
+        got.update(hub_assignments)
+        left |= hub_unassigned - placed
+    assert improver.recovered == expected_recovered
+    assert ids_of(got) == ids_of(expected) and left == expected_left
+
+
+def test_budget_runs_down_with_time_spent_improving(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(improve, 'time', clock)
+    paths = write_inputs(tmp_path, seed=1)
+    riders = load_riders(paths['riders'])
+    improver = improve.HubImprover(riders, 100, 2)
+
+    def slow_improve_hub(hub_riders, hub_assignments, waiting, deadline):
+        clock.now = deadline  # Uses its whole share
+        return hub_assignments, set()
+    monkeypatch.setattr(improve, 'improve_hub', slow_improve_hub)
+    hub_id = next(iter(riders.grouped_by_hub()))
+    waiting = [improve.Parcel('P1', 'Ann', 'NORMAL', hub_id, 'Sabiiti', 1.0)]
+    improver.improve(hub_id, {}, waiting)
+    assert abs(improver.budget - 0.05) < 1e-9  # Half for the first of two hubs
+    improver.improve(hub_id, {}, waiting)
+    assert improver.out_of_time()
@@ -0,0 +1,66 @@
+"""LiveAssigner: a parcel ID sent again replaces the earlier copy, like the last row in a CSV."""
+import asyncio
+import logging
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+from engine import assign_parcels, load_hubs, load_parcels, load_pickups, load_riders
+from live import LiveAssigner, LivePipeline
+from models import Parcel
+from test_assign_parcels import ids_of, write_inputs
+
+logging.disable(logging.WARNING)
+
+
+def riders_file(folder, text: str):
+    path = os.path.join(folder, 'riders.csv')
+    with open(path, 'w') as f:
+        f.write('rider_id,name,max_load_kg,home_hub_id\n' + text)
+    return load_riders(path)
+
+
+def test_resent_parcel_replaces_the_old_copy(tmp_path):
+    live = LiveAssigner(riders_file(tmp_path, 'R1,Sunday,5.0,H1\n'), {})
+    assert live.assign(Parcel('P1', 'Ann', 'NORMAL', 'H1', 'Sabiiti', 3.0)) == 'R1'
+    assert live.assign(Parcel('P1', 'Ann', 'NORMAL', 'H1', 'Sabiiti', 1.5)) == 'R1'
+    assert live.assign(Parcel('P2', 'Bob', 'NORMAL', 'H1', 'Sabiiti', 1.0)) == 'R1'
+    assert ids_of(live.assignments) == {'R1': ['P1', 'P2']}
+    assert live.hubs['H1'].loads == [2.5]
+    assert live.unassigned == set()
+
+
+def test_resent_parcel_leaves_unassigned_or_moves_hub(tmp_path):
+    live = LiveAssigner(riders_file(tmp_path, 'R1,Sunday,2.0,H1\nR2,Moses,2.0,H2\n'), {})
+    assert live.assign(Parcel('P1', 'Ann', 'NORMAL', 'H1', 'Sabiiti', 9.0)) is None
+    assert live.unassigned == {'P1'}
+    assert live.assign(Parcel('P1', 'Ann', 'NORMAL', 'H2', 'Sabiiti', 1.0)) == 'R2'
+    assert live.unassigned == set()
+    assert live.assign(Parcel('P1', 'Ann', 'NORMAL', 'H7', 'Sabiiti', 1.0)) is None  # No riders at H7
+    assert ids_of(live.assignments) == {'R2': []} and live.hubs['H2'].loads == [0]
+    assert live.unassigned == set()
+
+
+def test_one_batch_matches_assign_parcels(tmp_path):
+    for seed in range(20):
+        paths = write_inputs(tmp_path, seed)  # Repeated IDs, like a feed that sends corrections
+        hubs, riders = load_hubs(paths['hubs']), load_riders(paths['riders'])
+        pickups, parcels = load_pickups(paths['pickups'], hubs), load_parcels(paths['parcels'])
+        expected_assignments, expected_unassigned = assign_parcels(hubs, riders, parcels, pickups)
+
+        live = LiveAssigner(riders, pickups)
+        pipeline = LivePipeline(live, max_batch=10 ** 6)
+
+        async def feed():
+            with open(paths['parcels']) as f:
+                for line in f:
+                    await pipeline.put_line(line)
+            task = asyncio.ensure_future(pipeline.run_assigner())
+            await pipeline.queue.join()
+            task.cancel()
+        asyncio.run(feed())
+        assert {r: ids for r, ids in ids_of(live.assignments).items() if ids} == \
+            {r: ids for r, ids in ids_of(expected_assignments).items() if ids}
+        assert live.unassigned == expected_unassigned
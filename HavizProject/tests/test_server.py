@@ -0,0 +1,59 @@
+"""DispatchState.reload: appended parcels only show up in the view that RELOAD swaps in."""
+import logging
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+import engine
+from server import DispatchState
+from test_assign_parcels import write_inputs
+
+logging.disable(logging.WARNING)
+
+
+def state_for(paths) -> DispatchState:
+    return DispatchState(paths['hubs'], paths['parcels'], paths['riders'], paths['pickups'])
+
+
+def append(path: str, text: str):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+def test_reload_matches_a_fresh_start(tmp_path):
+    paths = write_inputs(tmp_path, seed=3)
+    state = state_for(paths)
+    old_view = state.view
+    append(paths['parcels'], 'PNEW1,Ann,EXPRESS,H1,Sabiiti,0.5\nPNEW2,Bob,normal,H1,PICKUP:K1,0.25\nbad row\n')
+    view, appended = state.reload()
+    assert appended == 2
+    assert not old_view.parcels.exists('PNEW1')  # The old view is never changed
+    fresh = state_for(paths).view
+    assert view.assignments.keys() == fresh.assignments.keys()
+    assert {r: [p.parcel_id for p in ps] for r, ps in view.assignments.items()} == \
+        {r: [p.parcel_id for p in ps] for r, ps in fresh.assignments.items()}
+    assert view.unassigned == fresh.unassigned
+    assert state.reload() == (view, 0)  # Nothing new: the same view
+
+
+def test_failed_reload_keeps_the_rows_for_next_time(tmp_path, monkeypatch):
+    paths = write_inputs(tmp_path, seed=3)
+    state = state_for(paths)
+    append(paths['parcels'], 'PNEW1,Ann,EXPRESS,H1,Sabiiti,0.5\n')
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("planning failed")
+    real = engine.assign_parcels
+    monkeypatch.setattr(engine, 'assign_parcels', broken)
+    with pytest.raises(RuntimeError):
+        state.reload()
+    assert state.handle('WHERE PNEW1') == {'ok': False, 'error': 'Unknown parcel PNEW1'}
+
+    monkeypatch.setattr(engine, 'assign_parcels', real)
+    view, appended = state.reload()
+    assert appended == 1 and view.parcels.exists('PNEW1')
+    assert state.handle('WHERE PNEW1')['ok']
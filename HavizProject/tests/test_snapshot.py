@@ -0,0 +1,48 @@
+"""--snapshot: a parcels file that grows while the snapshot is built still gives a normal run."""
+import logging
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+import cli
+import snapshot
+from test_assign_parcels import write_inputs
+
+logging.disable(logging.WARNING)
+
+
+def run_cli(paths, capsys, *extra):
+    cli.main(['--hubs', paths['hubs'], '--parcels', paths['parcels'], '--riders', paths['riders'],
+              '--pickups', paths['pickups'], '--assign', '--no-cache', *extra])
+    return capsys.readouterr().out
+
+
+def test_parcels_appended_during_the_build(tmp_path, capsys, monkeypatch):
+    paths = write_inputs(tmp_path, seed=3)
+    snap_path = str(tmp_path / 'courier.snap')
+    load_parcel_store = snapshot.load_parcel_store
+
+    def load_then_append(path, *args):
+        store = load_parcel_store(path, *args)
+        with open(path, 'a') as f:  # The feed grows after it was read
+            f.write('P999,Someone,EXPRESS,H1,Sabiiti,0.1\n')
+        return store
+    monkeypatch.setattr(snapshot, 'load_parcel_store', load_then_append)
+    with open(paths['parcels']) as f:
+        before = f.read()
+    out = run_cli(paths, capsys, '--snapshot', snap_path)
+
+    with open(paths['parcels'], 'w') as f:  # Same run on the file as it was read
+        f.write(before)
+    assert out == run_cli(paths, capsys)
+    assert snapshot.open_snapshot(snap_path, paths['hubs'], paths['parcels'], paths['riders'], paths['pickups']) is None
+
+
+def test_snapshot_is_used_when_it_matches(tmp_path, capsys):
+    paths = write_inputs(tmp_path, seed=4)
+    snap_path = str(tmp_path / 'courier.snap')
+    first = run_cli(paths, capsys, '--snapshot', snap_path)  # Builds it
+    assert snapshot.open_snapshot(snap_path, paths['hubs'], paths['parcels'], paths['riders'], paths['pickups']) is not None
+    assert run_cli(paths, capsys, '--snapshot', snap_path) == first == run_cli(paths, capsys)
@@ -0,0 +1,59 @@
+"""validate_parcels accepts what the loader accepts, and reports bad rows with their file line numbers."""
+import logging
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'courierlite'))
+
+from engine import RiderRepo, load_hubs, load_riders
+from validate import validate_parcels
+
+logging.disable(logging.WARNING)
+
+HEADER = 'parcel_id,recipient,priority,hub_id,destination,weight_kg\n'
+
+
+def write(folder, name: str, text: str) -> str:
+    path = os.path.join(folder, name)
+    with open(path, 'w', newline='') as f:
+        f.write(text)
+    return path
+
+
+def setup(folder):
+    hubs = load_hubs(write(folder, 'hubs.csv', 'hub_id,hub_name,campus\nH1,Cafe,UCU\nH2,Library,UCU\n'))
+    riders = load_riders(write(folder, 'riders.csv', 'rider_id,name,max_load_kg,home_hub_id\nR1,Sunday,5.0,H1\n'))
+    return hubs, riders
+
+
+def test_priority_case_is_accepted_like_the_loader(tmp_path):
+    hubs, riders = setup(tmp_path)
+    path = write(tmp_path, 'parcels.csv', HEADER + 'P1,Ann,express,H1,Sabiiti,1.0\nP2,Bob,Normal,H1,Sabiiti,1.0\n')
+    report = validate_parcels(path, hubs, riders)
+    assert report.ok and report.rows == 2
+
+
+def test_problems_keep_their_line_numbers(tmp_path):
+    hubs, riders = setup(tmp_path)
+    good = 'P0,Ann,EXPRESS,H1,Sabiiti,1.0\n'
+    rows = [good] * 3000  # More than one scan block
+    rows[10] = 'P1,Ann,URGENT,H1,Sabiiti,1.0\n'
+    rows[1500] = 'P2,Ann,NORMAL,H9,Sabiiti,1.0\n'
+    rows[2000] = 'P3,Ann,NORMAL,H1,Sabiiti\n'
+    rows[2500] = 'P4,Ann,NORMAL,H1,Sabiiti,heavy\n'
+    rows[2998] = 'P5,Ann,NORMAL,H1,Sabiiti,9.0\n'
+    rows[2999] = 'P6,Ann,NORMAL,H2,Sabiiti,-1'  # No line end after the last row
+    for text in (HEADER + ''.join(rows), (HEADER + ''.join(rows)).replace('\n', '\r\n')):
+        report = validate_parcels(write(tmp_path, 'parcels.csv', text), hubs, riders)
+        assert report.rows == 3000
+        assert report.lines == {'unknown_priority': [12], 'unknown_hub': [1502], 'wrong_columns': [2002],
+                                'bad_weight': [2502], 'too_heavy': [3000], 'negative_weight': [3001]}
+
+
+def test_quoted_file_goes_through_csv(tmp_path):
+    hubs, _ = setup(tmp_path)
+    path = write(tmp_path, 'parcels.csv', HEADER + 'P1,"Ann, Jr",EXPRESS,H1,Sabiiti,1.0\nP2,"Bob",LATER,H1,Sabiiti,1.0\n')
+    report = validate_parcels(path, hubs, RiderRepo())
+    assert report.rows == 2
+    assert report.lines == {'unknown_priority': [3]}